@@ -1,10 +1,230 @@
+import hashlib
+import math
+import random
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
 from django.core.cache import cache
 from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def get_cache_generation(key_prefix: str):
+    """
+    Return the current generation number of the given prefix.
+
+    A missing counter is seeded from the clock rather than zero, so a
+    counter evicted from redis can never bring back old entries.
+    """
+    key = f"{key_prefix}.generation"
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        generation = cache.get(key)
+    return generation
 
 
 def delete_cache(key_prefix: str):
+    """
+    Invalidate all cache keys with the given prefix.
+
+    Bumps the generation counter with a single INCR, entries cached under
+    the old generation become unreachable and expire with their TTL.
+    """
+    key = f"{key_prefix}.generation"
+    try:
+        return cache.incr(key)
+    except ValueError:
+        get_cache_generation(key_prefix)
+        return cache.incr(key)
+
+
+def get_user_key_prefix(key_prefix: str, user):
+    """
+    Prefix of the cached responses of one user. Each user has a generation
+    of its own, a write only invalidates the entries of the writing user.
+    """
+    scope = user.pk if user.is_authenticated else "anon"
+    return f"{key_prefix}.{scope}"
+
+
+def delete_cache_pattern(key_prefix: str):
     """
     Delete all cache keys with the given prefix.
+
+    Runs a SCAN over the whole keyspace, only kept to compare against the
+    generation based delete_cache in benchmarks.
     """
     keys_pattern = f"views.decorators.cache.cache_*.{key_prefix}.*.{settings.LANGUAGE_CODE}.{settings.TIME_ZONE}"
     cache.delete_pattern(keys_pattern)
+
+
+def incr_counter(key: str):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key)
+
+
+def get_cache_stats(key_prefix: str):
+    """
+    Return the hit/miss counters recorded by cache_response, kept outside
+    of the prefix so they are not held in the local cache tier.
+    """
+    hits = cache.get(f"cache-stats.{key_prefix}.hits") or 0
+    misses = cache.get(f"cache-stats.{key_prefix}.misses") or 0
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+    }
+
+
+def reset_cache_stats(key_prefix: str):
+    cache.delete_many(
+        [f"cache-stats.{key_prefix}.hits", f"cache-stats.{key_prefix}.misses"]
+    )
+
+
+def get_cache_query_params(view):
+    """
+    Query parameters that change the response of a viewset list:
+    filterset fields, ordering and pagination parameters.
+    """
+    params = set()
+    filterset_fields = getattr(view, "filterset_fields", None) or {}
+    if isinstance(filterset_fields, dict):
+        for field, lookups in filterset_fields.items():
+            for lookup in lookups:
+                params.add(
+                    field if lookup == "exact" else f"{field}__{lookup}"
+                )
+    else:
+        params.update(filterset_fields)
+    for backend in getattr(view, "filter_backends", []):
+        if hasattr(backend, "ordering_param"):
+            params.add(backend.ordering_param)
+    paginator = getattr(view, "paginator", None)
+    for attr in (
+        "cursor_query_param",
+        "page_query_param",
+        "page_size_query_param",
+        "limit_query_param",
+        "offset_query_param",
+    ):
+        param = getattr(paginator, attr, None)
+        if param:
+            params.add(param)
+    return params
+
+
+def get_response_cache_key(view, request, key_prefix: str, generation=None):
+    """
+    Build a cache key from the canonical form of the request: known query
+    parameters sorted by name (values of `__in` lookups sorted too), the
+    host used in pagination links and the user instead of its token.
+    The current generation of the user, see get_user_key_prefix, is used
+    unless one is given.
+
+    Filters, ordering and pagination only read the last value of a
+    repeated parameter, so only that value is part of the key.
+    """
+    query = []
+    for param in sorted(get_cache_query_params(view)):
+        value = request.query_params.get(param, "")
+        if param.endswith("__in"):
+            value = ",".join(sorted(set(value.split(","))))
+        if value != "":
+            query.append((param, value))
+    canonical = urlencode([("host", request.get_host())] + query)
+    digest = hashlib.md5(canonical.encode()).hexdigest()
+    scope = request.user.pk if request.user.is_authenticated else "anon"
+    if generation is None:
+        generation = get_cache_generation(
+            get_user_key_prefix(key_prefix, request.user)
+        )
+    return f"{key_prefix}.{generation}.{scope}.{digest}"
+
+
+def expires_early(entry, beta):
+    """
+    Probabilistic early expiration: the closer an entry is to its expiry
+    and the longer it took to compute, the likelier a reader recomputes it
+    before it expires, so entries rarely expire under all readers at once.
+    """
+    gap = -entry["delta"] * beta * math.log(1.0 - random.random())
+    return time.time() + gap >= entry["expires"]
+
+
+def cache_response(timeout, key_prefix: str, lock_timeout=10, beta=1.0):
+    """
+    Cache the data of a successful DRF response of a viewset action.
+
+    Responses are stored under get_response_cache_key, so they are shared
+    by every token of a user and by any order of the query parameters.
+    The entries of a user are invalidated with
+    delete_cache(get_user_key_prefix(key_prefix, user)). Hits and misses
+    are counted under the prefix and reported in the X-Cache header.
+
+    Only one reader regenerates a missing entry, holding a cache lock.
+    The others get the last copy of the previous generation (X-Cache:
+    STALE) or, without one, wait for the new entry up to `lock_timeout`
+    seconds. Entries are recomputed early with probability growing with
+    `beta`, see expires_early.
+    """
+
+    def cached_response(entry, state):
+        incr_counter(f"cache-stats.{key_prefix}.hits")
+        return Response(entry["data"], headers={"X-Cache": state})
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def _wrapped_view(view, request, *args, **kwargs):
+            key = get_response_cache_key(view, request, key_prefix)
+            entry = cache.get(key)
+            if entry is not None and not expires_early(entry, beta):
+                return cached_response(entry, "HIT")
+
+            lock_key = f"{key}.lock"
+            stale_key = get_response_cache_key(
+                view, request, key_prefix, generation="stale"
+            )
+            locked = cache.add(lock_key, 1, lock_timeout)
+            if not locked:
+                # another reader is regenerating this entry
+                if entry is not None:
+                    return cached_response(entry, "HIT")
+                entry = cache.get(stale_key)
+                if entry is not None:
+                    return cached_response(entry, "STALE")
+                deadline = time.monotonic() + lock_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    entry = cache.get(key)
+                    if entry is not None:
+                        return cached_response(entry, "HIT")
+
+            incr_counter(f"cache-stats.{key_prefix}.misses")
+            try:
+                started = time.perf_counter()
+                response = view_method(view, request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    entry = {
+                        "data": response.data,
+                        "delta": time.perf_counter() - started,
+                        "expires": time.time() + timeout,
+                    }
+                    cache.set_many({key: entry, stale_key: entry}, timeout)
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+            response["X-Cache"] = "MISS"
+            return response
+
+        return _wrapped_view
+
+    return decorator
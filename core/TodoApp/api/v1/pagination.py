@@ -0,0 +1,134 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class TaskCursorPagination(CursorPagination):
+    """
+    Keyset pagination over a unique (created_date, id) ordering.
+
+    The cursor position holds the value of every ordering field, so each
+    page is fetched with a range filter on the composite index instead of
+    an OFFSET and deep pages cost the same as the first one.
+    """
+
+    ordering = ("-created_date", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    position_separator = "|"
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        # always finish with the primary key so positions are unique
+        if ordering[-1].lstrip("-") not in ("id", "pk"):
+            descending = ordering[-1].startswith("-")
+            ordering.append("-id" if descending else "id")
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = (0, False, None)
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(queryset, current_position, reverse)
+            )
+
+        # fetch one extra row to know whether a following page exists
+        stop = offset + self.page_size + 1
+        results = list(queryset[offset:stop])
+        self.page = results[:-1] if len(results) > self.page_size else results
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_keyset_filter(self, queryset, position, reverse):
+        """
+        Build `(a, b) > (x, y)` style row comparison for the cursor
+        position as `a >= x AND (a > x OR (a = x AND b > y))`, the leading
+        bound lets the database use the index as a range scan.
+        """
+        values = position.split(self.position_separator)
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        lookups = []
+        for order, value in zip(self.ordering, values):
+            attr = order.lstrip("-")
+            field = queryset.model._meta.get_field(
+                "id" if attr == "pk" else attr
+            )
+            try:
+                value = field.to_python(value)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+            # Test for: (cursor reversed) XOR (field reversed)
+            operator = "lt" if reverse != order.startswith("-") else "gt"
+            lookups.append((attr, operator, value))
+
+        keyset = Q()
+        equal = Q()
+        for attr, operator, value in lookups:
+            keyset |= equal & Q(**{f"{attr}__{operator}": value})
+            equal &= Q(**{attr: value})
+
+        attr, operator, value = lookups[0]
+        return Q(**{f"{attr}__{operator}e": value}) & keyset
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field_name = order.lstrip("-")
+            if isinstance(instance, dict):
+                attr = instance[field_name]
+            else:
+                attr = getattr(instance, field_name)
+            values.append(
+                attr.isoformat() if hasattr(attr, "isoformat") else str(attr)
+            )
+        return self.position_separator.join(values)
@@ -0,0 +1,92 @@
+import csv
+import json
+
+from rest_framework import renderers, serializers
+
+from .serializers import STATUS_LABELS
+
+
+class Echo:
+    """
+    File-like object that returns what is written to it, lets csv.writer
+    produce rows for a streaming response.
+    """
+
+    def write(self, value):
+        return value
+
+
+class TaskExportRenderer(renderers.BaseRenderer):
+    """
+    Base renderer of the task export. `render_rows` lazily renders rows of
+    `fields` values, a chunk of rows at a time, for a StreamingHttpResponse.
+    """
+
+    charset = "utf-8"
+    fields = ["id", "name", "status", "created_date"]
+    chunk_size = 1000
+
+    def __init__(self):
+        self.date_field = serializers.DateTimeField()
+
+    def format_row(self, row):
+        pk, name, status, created_date = row
+        return (
+            pk,
+            name,
+            STATUS_LABELS.get(status, status),
+            self.date_field.to_representation(created_date),
+        )
+
+    def render_rows(self, rows):
+        chunk = []
+        for row in rows:
+            chunk.append(self.render_row(self.format_row(row)))
+            if len(chunk) >= self.chunk_size:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+
+    def render_row(self, row):
+        raise NotImplementedError
+
+
+class NDJSONRenderer(TaskExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
+
+    def render_row(self, row):
+        return (
+            json.dumps(dict(zip(self.fields, row)), ensure_ascii=False) + "\n"
+        )
+
+
+class CSVRenderer(TaskExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+    def __init__(self):
+        super().__init__()
+        self.writer = csv.writer(Echo())
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # only used for error responses, one "field,message" row per error
+        if not isinstance(data, dict):
+            data = {"detail": data}
+        rows = []
+        for field, errors in data.items():
+            if not isinstance(errors, list):
+                errors = [errors]
+            rows.extend(self.writer.writerow([field, e]) for e in errors)
+        return "".join(rows).encode(self.charset)
+
+    def render_rows(self, rows):
+        yield self.writer.writerow(self.fields)
+        yield from super().render_rows(rows)
+
+    def render_row(self, row):
+        return self.writer.writerow(row)
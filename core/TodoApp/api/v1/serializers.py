@@ -1,13 +1,129 @@
 from ...models import Task
+from django.db import NotSupportedError, connections, router, transaction
 from rest_framework import serializers
 
+BULK_MAX_ITEMS = 10000
+# status labels looked up once instead of get_status_display() per row
+STATUS_LABELS = dict(Task.task_status)
+
+
+class TaskListSerializer(serializers.ListSerializer):
+    """
+    Create and update many tasks with bulk queries.
+
+    For updates the serializer is built with a task queryset as instance,
+    every item must carry the id of one of its tasks.
+    """
+
+    batch_size = 1000
+
+    def to_internal_value(self, data):
+        if self.instance is not None and isinstance(data, list):
+            ids = [
+                item.get("id")
+                for item in data
+                if isinstance(item, dict) and type(item.get("id")) is int
+            ]
+            self.tasks = self.instance.in_bulk(ids)
+            self.seen_ids = set()
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        if self.instance is None:
+            return super().run_child_validation(data)
+        pk = data.get("id") if isinstance(data, dict) else None
+        if pk not in self.tasks:
+            raise serializers.ValidationError({"id": ["task does not exist"]})
+        if pk in self.seen_ids:
+            raise serializers.ValidationError({"id": ["duplicate task id"]})
+        self.seen_ids.add(pk)
+        self.child.instance = self.tasks[pk]
+        self.child.initial_data = data
+        validated = super().run_child_validation(data)
+        validated["id"] = pk
+        return validated
+
+    def create(self, validated_data):
+        """
+        Insert the tasks in batches. Postgres returns the ids of the rows.
+        Sqlite does not, but a transaction that wrote holds the only write
+        lock of the database until it ends, so the rows of a batch have
+        the highest ids and are read back. Other backends without RETURNING
+        allow concurrent inserts and are refused.
+        """
+        tasks = [Task(**attrs) for attrs in validated_data]
+        queryset = Task.objects.using(router.db_for_write(Task))
+        connection = connections[queryset.db]
+        read_back = not connection.features.can_return_rows_from_bulk_insert
+        if read_back and connection.vendor != "sqlite":
+            raise NotSupportedError(
+                f"ids of bulk created tasks cannot be read on "
+                f"{connection.vendor}"
+            )
+        with transaction.atomic(using=queryset.db):
+            for start in range(0, len(tasks), self.batch_size):
+                stop = start + self.batch_size
+                batch = tasks[start:stop]
+                queryset.bulk_create(batch)
+                if read_back:
+                    ids = queryset.order_by("-id").values_list(
+                        "id", flat=True
+                    )[: len(batch)]
+                    for task, pk in zip(batch, reversed(ids)):
+                        task.pk = pk
+        return tasks
+
+    def update(self, instance, validated_data):
+        tasks = []
+        fields = set()
+        for attrs in validated_data:
+            task = self.tasks[attrs.pop("id")]
+            for attr, value in attrs.items():
+                setattr(task, attr, value)
+            fields.update(attrs)
+            tasks.append(task)
+        if fields:
+            Task.objects.bulk_update(
+                tasks, list(fields), batch_size=self.batch_size
+            )
+        return tasks
+
 
 class TaskSerializers(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ["id", "name", "status", "created_date"]
+        list_serializer_class = TaskListSerializer
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation["status"] = instance.get_status_display()
+        representation["status"] = STATUS_LABELS.get(
+            instance.status, instance.status
+        )
         return representation
+
+
+class TaskReadSerializer(TaskSerializers):
+    """
+    Read only serializer for task responses, gives the same output as
+    TaskSerializers without running a field per row. Its fields are only
+    there for the api schema.
+    """
+
+    def to_representation(self, instance):
+        return {
+            "id": instance.id,
+            "name": instance.name,
+            "status": STATUS_LABELS.get(instance.status, instance.status),
+            "created_date": self.fields["created_date"].to_representation(
+                instance.created_date
+            ),
+        }
+
+
+class TaskBulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_MAX_ITEMS,
+    )
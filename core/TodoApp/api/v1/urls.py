@@ -1,3 +1,4 @@
+from django.urls import path
 from . import views
 from rest_framework.routers import DefaultRouter
 
@@ -5,4 +6,12 @@ app_name = "api-v1"
 
 router = DefaultRouter()
 router.register("task", views.TaskModelViewSet, basename="task")
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    # same responses as task-list/task-detail, for the asgi server
+    path("async/task/", views.async_task_list, name="async-task-list"),
+    path(
+        "async/task/<int:pk>/",
+        views.async_task_detail,
+        name="async-task-detail",
+    ),
+]
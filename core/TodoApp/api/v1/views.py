@@ -1,48 +1,222 @@
-from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticatedOrReadOnly
 from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-
+from django.db import close_old_connections, transaction
+from django.http import HttpResponseNotAllowed, StreamingHttpResponse
+from asgiref.sync import sync_to_async
 
 from accounts.permissions import IsVerifiedOrReadOnly
+from accounts.authentication import ClaimsHeaderDispatchAuthentication
+from core.db.router import ReplicaReadMixin
 
 from ...models import Task
-from .serializers import TaskSerializers
-from ..utils import delete_cache
+from .serializers import (
+    BULK_MAX_ITEMS,
+    TaskSerializers,
+    TaskReadSerializer,
+    TaskBulkDeleteSerializer,
+)
+from .pagination import TaskCursorPagination
+from .renderers import NDJSONRenderer, CSVRenderer
+from ..utils import delete_cache, cache_response, get_user_key_prefix
 
 
-class TaskModelViewSet(viewsets.ModelViewSet):
+class TaskModelViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     CACHE_KEY_PREFIX = "task-view"
+    authentication_classes = [ClaimsHeaderDispatchAuthentication]
     permission_classes = [IsAuthenticatedOrReadOnly, IsVerifiedOrReadOnly]
     queryset = Task.objects.all()
     serializer_class = TaskSerializers
+    pagination_class = TaskCursorPagination
     http_method_names = ["get", "post", "put", "patch", "delete"]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = {"status": ["exact", "in"]}
     ordering_fields = ["created_date"]
+    throttle_scope = "task-write"
+    EXPORT_CHUNK_SIZE = 2000
+
+    def get_queryset(self):
+        """
+        Tasks of the requesting user, read with the owner indexes of Task.
+        The user may be a TokenUser built from the token claims, only its
+        pk is used.
+        """
+        if not self.request.user.is_authenticated:
+            return Task.objects.none()
+        return Task.objects.filter(owner_id=self.request.user.pk)
+
+    def get_throttles(self):
+        # reads are served from the cache, only writes are limited
+        if self.request.method in SAFE_METHODS:
+            return []
+        return super().get_throttles()
+
+    def get_throttle_cost(self, request):
+        # bulk requests are charged one per task, see core.throttling
+        if self.throttle_scope != "task-bulk":
+            return 1
+        items = request.data
+        if self.action == "bulk_destroy" and isinstance(items, dict):
+            items = items.get("ids")
+        if not isinstance(items, list):
+            return 1
+        return max(len(items), 1)
+
+    def perform_create(self, serializer):
+        serializer.save(owner_id=self.request.user.pk)
+
+    def invalidate_list_cache(self):
+        # lists are scoped to their owner, other users keep their entries
+        delete_cache(
+            get_user_key_prefix(self.CACHE_KEY_PREFIX, self.request.user)
+        )
 
-    @method_decorator(cache_page(300, key_prefix=CACHE_KEY_PREFIX))
+    def get_serializer_class(self):
+        if self.action in ("list", "retrieve"):
+            return TaskReadSerializer
+        return super().get_serializer_class()
+
+    @cache_response(300, key_prefix=CACHE_KEY_PREFIX)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
     def create(self, request, *args, **kwargs):
         response = super().create(request, *args, **kwargs)
-        delete_cache(self.CACHE_KEY_PREFIX)
+        self.invalidate_list_cache()
         return response
 
     def update(self, request, *args, **kwargs):
         response = super().update(request, *args, **kwargs)
-        delete_cache(self.CACHE_KEY_PREFIX)
+        self.invalidate_list_cache()
         return response
 
     def partial_update(self, request, *args, **kwargs):
         response = super().partial_update(request, *args, **kwargs)
-        delete_cache(self.CACHE_KEY_PREFIX)
+        self.invalidate_list_cache()
         return response
 
     def destroy(self, request, *args, **kwargs):
         response = super().destroy(request, *args, **kwargs)
-        delete_cache(self.CACHE_KEY_PREFIX)
+        self.invalidate_list_cache()
         return response
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        url_name="bulk",
+        throttle_scope="task-bulk",
+    )
+    def bulk_create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(
+            data=request.data, many=True, max_length=BULK_MAX_ITEMS
+        )
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save(owner_id=request.user.pk)
+        self.invalidate_list_cache()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.put
+    def bulk_update(self, request, *args, **kwargs):
+        partial = kwargs.pop("partial", False)
+        serializer = self.get_serializer(
+            self.get_queryset(),
+            data=request.data,
+            many=True,
+            partial=partial,
+            max_length=BULK_MAX_ITEMS,
+        )
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save()
+        self.invalidate_list_cache()
+        return Response(serializer.data)
+
+    @bulk_create.mapping.patch
+    def bulk_partial_update(self, request, *args, **kwargs):
+        kwargs["partial"] = True
+        return self.bulk_update(request, *args, **kwargs)
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        serializer = TaskBulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = set(serializer.validated_data["ids"])
+        queryset = self.get_queryset().filter(id__in=ids)
+        with transaction.atomic():
+            found = set(queryset.values_list("id", flat=True))
+            deleted, _ = queryset.delete()
+        self.invalidate_list_cache()
+        return Response(
+            {"deleted": deleted, "not_found": sorted(ids - found)},
+            status=status.HTTP_200_OK,
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request, *args, **kwargs):
+        """
+        Stream the filtered tasks as NDJSON or CSV (`?format=csv`), rows
+        are read with a database iterator so memory use stays constant.
+        Under ASGI the rows are read in the thread of the views, see
+        core.handlers.ASGIHandler.
+        """
+        renderer = request.accepted_renderer
+        queryset = self.filter_queryset(self.get_queryset())
+        if not queryset.ordered:
+            queryset = queryset.order_by("id")
+        rows = queryset.values_list(*renderer.fields).iterator(
+            chunk_size=self.EXPORT_CHUNK_SIZE
+        )
+        response = StreamingHttpResponse(
+            renderer.render_rows(rows),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="tasks.{renderer.format}"'
+        )
+        return response
+
+
+def async_read_view(actions):
+    """
+    Serve read actions of TaskModelViewSet from an async view.
+
+    The ORM of django 3.2 is sync only, so the viewset (authentication,
+    cache, filters, pagination and rendering) runs in the thread pool with
+    thread_sensitive=False. Requests are then not funnelled through one
+    sync thread and the event loop stays free while they wait on the
+    database.
+    """
+    view = TaskModelViewSet.as_view(actions)
+    methods = [method.upper() for method in actions] + ["OPTIONS"]
+    if "GET" in methods:
+        methods.append("HEAD")
+
+    def render_view(request, *args, **kwargs):
+        # request_started/finished only clean up the handler thread
+        close_old_connections()
+        try:
+            return view(request, *args, **kwargs).render()
+        finally:
+            close_old_connections()
+
+    async def async_view(request, *args, **kwargs):
+        if request.method not in methods:
+            return HttpResponseNotAllowed(methods)
+        return await sync_to_async(render_view, thread_sensitive=False)(
+            request, *args, **kwargs
+        )
+
+    return async_view
+
+
+async_task_list = async_read_view({"get": "list"})
+async_task_detail = async_read_view({"get": "retrieve"})
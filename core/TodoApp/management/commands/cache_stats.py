@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from TodoApp.api.utils import get_cache_stats, reset_cache_stats
+from TodoApp.api.v1.views import TaskModelViewSet
+
+
+class Command(BaseCommand):
+    help = "show hit/miss counters of the task list response cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="reset the counters after showing them",
+        )
+
+    def handle(self, *args, **options):
+        key_prefix = TaskModelViewSet.CACHE_KEY_PREFIX
+        stats = get_cache_stats(key_prefix)
+        self.stdout.write(
+            "{prefix}: {hits} hits, {misses} misses, "
+            "hit rate {rate:.1%}".format(
+                prefix=key_prefix,
+                hits=stats["hits"],
+                misses=stats["misses"],
+                rate=stats["hit_rate"],
+            )
+        )
+        # L1/L2 counters of core.cache.TwoTierClient, of all processes
+        client = cache.client
+        if hasattr(client, "get_tier_stats"):
+            client.flush_stats()
+            tiers = client.get_tier_stats()
+            self.stdout.write(
+                "tiers: {l1} L1 hits ({l1_rate:.1%}), {l2} L2 hits "
+                "({l2_rate:.1%}), {misses} misses".format(
+                    l1=tiers["l1_hits"],
+                    l1_rate=tiers["l1_hit_ratio"],
+                    l2=tiers["l2_hits"],
+                    l2_rate=tiers["l2_hit_ratio"],
+                    misses=tiers["misses"],
+                )
+            )
+        if options["reset"]:
+            reset_cache_stats(key_prefix)
+            if hasattr(client, "reset_tier_stats"):
+                client.reset_tier_stats()
@@ -1,22 +1,137 @@
-from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
 from TodoApp.models import Task
 from faker import Faker
+from core.processes import process_pool
 
-from datetime import datetime
+import csv
+import io
 import random
+import time
+
+
+def copy_tasks(names, statuses, owners, created_date):
+    """
+    Insert rows with COPY, the fastest way to load postgres.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for name, status, owner in zip(names, statuses, owners):
+        # an empty field is NULL
+        writer.writerow([name, status, owner, created_date.isoformat()])
+    buffer.seek(0)
+    table = connection.ops.quote_name(Task._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table} (name, status, owner_id, created_date) "
+            "FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+
+
+def insert_tasks(count, names, owners, batch_size):
+    """
+    Insert `count` random tasks of random `owners` (user ids), one
+    transaction per batch of rows.
+    """
+    inserted = 0
+    while inserted < count:
+        size = min(batch_size, count - inserted)
+        batch_names = random.choices(names, k=size)
+        statuses = random.choices([Task.ON_GOING, Task.DONE], k=size)
+        batch_owners = random.choices(owners, k=size)
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                copy_tasks(batch_names, statuses, batch_owners, timezone.now())
+            else:
+                Task.objects.bulk_create(
+                    Task(name=name, status=status, owner_id=owner)
+                    for name, status, owner in zip(
+                        batch_names, statuses, batch_owners
+                    )
+                )
+        inserted += size
+    return inserted
 
 
 class Command(BaseCommand):
-    help = "create a test task and test faker module"
+    help = "create random tasks with faker, in batches for large counts"
 
     def __init__(self, *args, **kwargs):
         super(Command, self).__init__(*args, **kwargs)
         self.faker = Faker()
 
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="number of processes inserting in parallel (postgres only)",
+        )
+        parser.add_argument(
+            "--owner",
+            help="email of the user owning the tasks, "
+            "they are spread over all users by default",
+        )
+
     def handle(self, *args, **options):
-        for _ in range(5):
-            Task.objects.create(
-                name=self.faker.job(),
-                status=random.choice([1, 2]),
-                created_date=datetime.now(),
+        count = options["count"]
+        batch_size = options["batch_size"]
+        workers = options["workers"]
+        if workers > 1 and connection.vendor != "postgresql":
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{connection.vendor} does not allow parallel writers, "
+                    "using one worker"
+                )
+            )
+            workers = 1
+
+        # a pool of fake names is enough variety, faker is slow per call
+        max_length = Task._meta.get_field("name").max_length
+        names = [
+            self.faker.job()[:max_length] for _ in range(min(count, 1000))
+        ]
+
+        users = get_user_model().objects.all()
+        if options["owner"]:
+            users = users.filter(email=options["owner"])
+        owners = list(users.values_list("id", flat=True))
+        if options["owner"] and not owners:
+            raise CommandError(f"no user with email {options['owner']}")
+        if not owners:
+            self.stdout.write(
+                self.style.WARNING("there are no users, tasks have no owner")
+            )
+            owners = [None]
+
+        started = time.perf_counter()
+        if workers == 1:
+            inserted = insert_tasks(count, names, owners, batch_size)
+        else:
+            shares = [count // workers] * workers
+            for i in range(count % workers):
+                shares[i] += 1
+            # forked workers must not share the parent connection
+            connections.close_all()
+            with process_pool(workers) as pool:
+                inserted = sum(
+                    pool.map(
+                        insert_tasks,
+                        shares,
+                        [names] * workers,
+                        [owners] * workers,
+                        [batch_size] * workers,
+                    )
+                )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"inserted {inserted} tasks in {elapsed:.2f}s "
+                f"({inserted / elapsed:,.0f} tasks/s)"
             )
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('TodoApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['created_date', 'id'], name='todoapp_task_created_id_idx'),
+        ),
+    ]
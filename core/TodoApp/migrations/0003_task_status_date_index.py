@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("TodoApp", "0002_task_created_id_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["status", "created_date", "id"],
+                name="todoapp_task_status_date_idx",
+            ),
+        ),
+    ]
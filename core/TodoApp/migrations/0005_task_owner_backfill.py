@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.db import migrations, transaction
+from django.db.models import Max, Min
+
+BATCH_SIZE = 10000
+
+
+def assign_owners(apps, schema_editor, batch_size=BATCH_SIZE):
+    """
+    Give the tasks without an owner to the user whose email is the
+    TASK_ORPHAN_OWNER setting. Without it they keep no owner and no user
+    lists them. One UPDATE per range of `batch_size` ids, each in its own
+    transaction, so millions of rows are neither locked at once nor sent
+    row by row.
+    """
+    Task = apps.get_model("TodoApp", "Task")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    db = schema_editor.connection.alias
+    email = getattr(settings, "TASK_ORPHAN_OWNER", "")
+    if not email:
+        return
+    # a mistyped email fails the migration instead of skipping the backfill
+    owner = User.objects.using(db).get(email=email).id
+    tasks = Task.objects.using(db).filter(owner__isnull=True)
+    bounds = tasks.aggregate(first=Min("id"), last=Max("id"))
+    if bounds["first"] is None:
+        return
+    for start in range(bounds["first"], bounds["last"] + 1, batch_size):
+        with transaction.atomic(using=db):
+            tasks.filter(id__gte=start, id__lt=start + batch_size).update(
+                owner_id=owner
+            )
+
+
+class Migration(migrations.Migration):
+    # every batch commits on its own
+    atomic = False
+
+    dependencies = [
+        ("TodoApp", "0004_task_owner"),
+    ]
+
+    operations = [
+        migrations.RunPython(assign_owners, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 3.2.25 on 2026-10-18 11:44
+
+from django.contrib.postgres import operations
+from django.db import migrations, models
+
+
+class Concurrently:
+    """
+    CONCURRENTLY on postgres, the table takes writes while the index is
+    built or dropped, the plain operation on the other databases.
+    """
+
+    def database_forwards(self, app_label, schema_editor, *states):
+        if schema_editor.connection.vendor == "postgresql":
+            operation = super()
+        else:
+            operation = super(operations.NotInTransactionMixin, self)
+        operation.database_forwards(app_label, schema_editor, *states)
+
+    def database_backwards(self, app_label, schema_editor, *states):
+        if schema_editor.connection.vendor == "postgresql":
+            operation = super()
+        else:
+            operation = super(operations.NotInTransactionMixin, self)
+        operation.database_backwards(app_label, schema_editor, *states)
+
+
+class AddIndexConcurrently(Concurrently, operations.AddIndexConcurrently):
+    pass
+
+
+class RemoveIndexConcurrently(
+    Concurrently, operations.RemoveIndexConcurrently
+):
+    pass
+
+
+class Migration(migrations.Migration):
+    # postgres cannot build an index concurrently in a transaction
+    atomic = False
+
+    dependencies = [
+        ("TodoApp", "0005_task_owner_backfill"),
+    ]
+
+    # built after the backfill instead of updated by each of its rows
+    operations = [
+        RemoveIndexConcurrently(
+            model_name="task",
+            name="todoapp_task_created_id_idx",
+        ),
+        RemoveIndexConcurrently(
+            model_name="task",
+            name="todoapp_task_status_date_idx",
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                fields=["owner", "created_date", "id"],
+                name="todoapp_task_owner_date_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="task",
+            index=models.Index(
+                fields=["owner", "status", "created_date", "id"],
+                name="todoapp_task_owner_status_idx",
+            ),
+        ),
+    ]
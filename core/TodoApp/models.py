@@ -1,7 +1,17 @@
+from django.conf import settings
 from django.db import models
 
 
 class Task(models.Model):
+    # null for tasks from before ownership that no user could be given,
+    # the owner indexes below lead with it, no index of its own
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="tasks",
+        null=True,
+        db_index=False,
+    )
     name = models.CharField(max_length=35, null=False, blank=False)
 
     ON_GOING = 1
@@ -14,5 +24,20 @@ class Task(models.Model):
     status = models.IntegerField(choices=task_status)
     created_date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # lists are scoped to their owner, in keyset pagination order,
+            # see TaskModelViewSet.get_queryset and TaskCursorPagination
+            models.Index(
+                fields=["owner", "created_date", "id"],
+                name="todoapp_task_owner_date_idx",
+            ),
+            # status / status__in filters with the same ordering
+            models.Index(
+                fields=["owner", "status", "created_date", "id"],
+                name="todoapp_task_owner_status_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.name
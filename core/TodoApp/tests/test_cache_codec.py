@@ -0,0 +1,149 @@
+import pickle
+from datetime import datetime
+
+import pytest
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django_redis.cache import RedisCache
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from core.cache_codec import (
+    MsgpackSerializer,
+    OrjsonSerializer,
+    ThresholdCompressor,
+)
+from TodoApp.models import Task
+
+
+def make_cache(serializer, algorithm="zstd"):
+    return RedisCache(
+        settings.CACHES["default"]["LOCATION"],
+        {
+            "KEY_PREFIX": "test-cache-codec",
+            "OPTIONS": {
+                "SERIALIZER": serializer,
+                "COMPRESSOR": "core.cache_codec.ThresholdCompressor",
+                "COMPRESS_ALGORITHM": algorithm,
+                "COMPRESS_MIN_LENGTH": 256,
+            },
+        },
+    )
+
+
+@pytest.fixture
+def cleanup():
+    keys = []
+    yield keys
+    make_cache("core.cache_codec.OrjsonSerializer").delete_many(keys)
+
+
+def task_page(count=50):
+    return ReturnDict(
+        [
+            ("next", "http://testserver/api/v1/task/?cursor=cD0y"),
+            ("previous", None),
+            (
+                "results",
+                [
+                    {
+                        "id": i,
+                        "name": f"task {i}",
+                        "status": "تمام شده",
+                        "created_date": "2026-10-18T10:00:00Z",
+                    }
+                    for i in range(count)
+                ],
+            ),
+        ],
+        serializer=None,
+    )
+
+
+@pytest.mark.parametrize(
+    "serializer_class", [OrjsonSerializer, MsgpackSerializer]
+)
+class TestTaggedSerializer:
+    def test_payload_round_trip(self, serializer_class):
+        serializer = serializer_class({})
+        entry = {"data": task_page(), "delta": 0.5, "expires": 1.5}
+        encoded = serializer.dumps(entry)
+        assert encoded[:1] == serializer.tag
+        assert serializer.loads(encoded) == entry
+
+    def test_unsupported_values_fall_back_to_pickle(self, serializer_class):
+        serializer = serializer_class({})
+        for value in (
+            datetime(2026, 10, 18, 10, 0),
+            {1, 2},
+            Task(id=1, name="task", status=Task.DONE),
+        ):
+            encoded = serializer.dumps(value)
+            assert encoded[:1] == b"p"
+            assert serializer.loads(encoded) == value
+
+    def test_response_falls_back_to_pickle(self, serializer_class):
+        serializer = serializer_class({})
+        response = serializer.loads(serializer.dumps(HttpResponse(b"{}")))
+        assert response.content == b"{}"
+
+    def test_reads_values_of_other_serializers(self, serializer_class):
+        serializer = serializer_class({})
+        value = {"data": [1, "two"]}
+        assert serializer.loads(pickle.dumps(value)) == value
+        for other in (OrjsonSerializer({}), MsgpackSerializer({})):
+            assert serializer.loads(other.dumps(value)) == value
+
+
+class TestThresholdCompressor:
+    @pytest.mark.parametrize("algorithm", ["zstd", "lz4", "zlib"])
+    def test_compresses_above_threshold(self, algorithm):
+        compressor = ThresholdCompressor(
+            {"COMPRESS_ALGORITHM": algorithm, "COMPRESS_MIN_LENGTH": 100}
+        )
+        value = OrjsonSerializer({}).dumps(task_page())
+        compressed = compressor.compress(value)
+        assert len(compressed) < len(value)
+        assert compressor.decompress(compressed) == value
+
+    def test_small_and_incompressible_values_are_kept(self):
+        compressor = ThresholdCompressor({"COMPRESS_MIN_LENGTH": 100})
+        small = b"j" + b"a" * 50
+        assert compressor.compress(small) == small
+        noise = b"j" + bytes(range(256))
+        assert compressor.compress(noise) == noise
+        assert compressor.decompress(noise) == noise
+
+    def test_decompresses_other_algorithms(self):
+        value = b"j" + b"[1,2,3]" * 100
+        zstd = ThresholdCompressor({"COMPRESS_ALGORITHM": "zstd"})
+        lz4 = ThresholdCompressor({"COMPRESS_ALGORITHM": "lz4"})
+        assert lz4.decompress(zstd.compress(value)) == value
+
+    def test_unknown_algorithm(self):
+        with pytest.raises(ImproperlyConfigured):
+            ThresholdCompressor({"COMPRESS_ALGORITHM": "brotli"})
+
+
+class TestCacheCodec:
+    def test_round_trip_through_redis(self, cleanup):
+        cache = make_cache("core.cache_codec.OrjsonSerializer")
+        cleanup.extend(["page", "count", "when"])
+        page = task_page(200)
+        cache.set("page", page)
+        cache.set("count", 3)
+        cache.set("when", datetime(2026, 10, 18))
+        raw = cache.client.get_client().get(cache.make_key("page"))
+        assert raw[:1] == b"\x02"
+        assert cache.get("page") == page
+        assert cache.get("when") == datetime(2026, 10, 18)
+        assert cache.incr("count") == 4
+
+    def test_switching_codecs_keeps_entries(self, cleanup):
+        cleanup.append("page")
+        page = task_page(200)
+        make_cache("core.cache_codec.MsgpackSerializer", "lz4").set(
+            "page", page
+        )
+        cache = make_cache("core.cache_codec.OrjsonSerializer", "zstd")
+        assert cache.get("page") == page
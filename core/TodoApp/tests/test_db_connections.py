@@ -0,0 +1,153 @@
+import sqlite3
+import threading
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.utils import load_backend
+
+from core.db.pool import ConnectionPool, PoolTimeout, is_usable
+
+
+@pytest.fixture
+def make_wrapper(tmp_path):
+    wrappers = []
+
+    def make_wrapper(**settings):
+        settings_dict = {
+            **connections["default"].settings_dict,
+            "ENGINE": "core.db.sqlite3",
+            "NAME": str(tmp_path / "db.sqlite3"),
+            **settings,
+        }
+        backend = load_backend("core.db.sqlite3")
+        wrapper = backend.DatabaseWrapper(settings_dict, alias=str(tmp_path))
+        wrappers.append(wrapper)
+        return wrapper
+
+    yield make_wrapper
+    for wrapper in wrappers:
+        wrapper.close()
+        if wrapper.pool is not None:
+            wrapper.pool.close()
+
+
+def run_request(wrapper):
+    # what the request_started and request_finished signals do
+    wrapper.close_if_unusable_or_obsolete()
+    with wrapper.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    raw = wrapper.connection
+    wrapper.close_if_unusable_or_obsolete()
+    return raw
+
+
+def make_connect(tmp_path):
+    def connect():
+        # django does not tie sqlite connections to a thread either
+        return sqlite3.connect(
+            tmp_path / "db.sqlite3", check_same_thread=False
+        )
+
+    return connect
+
+
+class TestConnectionPool:
+    def test_reuses_most_recent_connection(self, tmp_path):
+        pool = ConnectionPool(max_size=2)
+        connect = make_connect(tmp_path)
+        first, second = pool.get(connect), pool.get(connect)
+        pool.put(first)
+        pool.put(second)
+        assert pool.get(connect) is second
+        assert pool.get(connect) is first
+
+    def test_waits_for_a_free_connection(self, tmp_path):
+        pool = ConnectionPool(max_size=1, timeout=0.05)
+        connect = make_connect(tmp_path)
+        connection = pool.get(connect)
+        with pytest.raises(PoolTimeout):
+            pool.get(connect)
+
+        pool.timeout = 2
+        threading.Timer(0.05, pool.put, [connection]).start()
+        assert pool.get(connect) is connection
+
+    def test_unusable_connections_are_replaced(self, tmp_path):
+        pool = ConnectionPool(max_size=2)
+        connect = make_connect(tmp_path)
+        connection = pool.get(connect)
+        pool.put(connection)
+        connection.close()
+        new = pool.get(connect, check=is_usable)
+        assert new is not connection
+        assert is_usable(new)
+
+    def test_broken_connections_are_not_kept(self, tmp_path):
+        pool = ConnectionPool(max_size=1)
+        connect = make_connect(tmp_path)
+        connection = pool.get(connect)
+        connection.close()
+        pool.put(connection)
+        assert len(pool.idle) == 0
+        assert pool.get(connect) is not connection
+
+
+@pytest.mark.django_db
+class TestDatabaseWrapper:
+    def test_requests_share_pooled_connections(self, make_wrapper):
+        wrapper = make_wrapper(OPTIONS={"pool": {"max_size": 2}})
+        first = run_request(wrapper)
+        assert wrapper.connection is None
+        assert run_request(wrapper) is first
+        # other threads have a wrapper of their own, the pool is shared
+        other = make_wrapper(OPTIONS={"pool": {"max_size": 2}})
+        assert run_request(other) is first
+
+    def test_pool_needs_connections_closed_after_requests(self, make_wrapper):
+        wrapper = make_wrapper(
+            CONN_MAX_AGE=60, OPTIONS={"pool": {"max_size": 2}}
+        )
+        with pytest.raises(ImproperlyConfigured):
+            wrapper.ensure_connection()
+
+    def test_persistent_connection_checked_once_per_request(
+        self, make_wrapper, monkeypatch
+    ):
+        wrapper = make_wrapper(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True)
+        checks = []
+        monkeypatch.setattr(
+            wrapper, "is_usable", lambda: checks.append(1) or True
+        )
+        first = run_request(wrapper)
+        assert checks == []
+        wrapper.close_if_unusable_or_obsolete()
+        for _ in range(2):
+            with wrapper.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        assert wrapper.connection is first
+        assert checks == [1]
+
+    def test_dropped_connection_reopened(self, make_wrapper, monkeypatch):
+        wrapper = make_wrapper(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True)
+        first = run_request(wrapper)
+        # the server closed the connection between two requests
+        monkeypatch.setattr(wrapper, "is_usable", lambda: False)
+        assert run_request(wrapper) is not first
+
+    def test_checked_before_transaction(self, make_wrapper, monkeypatch):
+        wrapper = make_wrapper(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True)
+        first = run_request(wrapper)
+        monkeypatch.setattr(wrapper, "is_usable", lambda: False)
+        wrapper.close_if_unusable_or_obsolete()
+        # what atomic() does before its first query
+        wrapper.set_autocommit(False)
+        assert wrapper.connection is not first
+        wrapper.rollback()
+        wrapper.set_autocommit(True)
+
+    def test_no_checks_without_setting(self, make_wrapper, monkeypatch):
+        wrapper = make_wrapper(CONN_MAX_AGE=60)
+        first = run_request(wrapper)
+        monkeypatch.setattr(wrapper, "is_usable", lambda: False)
+        assert run_request(wrapper) is first
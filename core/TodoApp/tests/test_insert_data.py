@@ -0,0 +1,38 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from accounts.models import User
+from TodoApp.models import Task
+
+
+@pytest.mark.django_db
+class TestInsertDataCommand:
+    def test_insert_data_default_count(self):
+        call_command("insert_data")
+        assert Task.objects.count() == 5
+
+    def test_insert_data_in_batches(self):
+        call_command("insert_data", count=1234, batch_size=500)
+        assert Task.objects.count() == 1234
+        assert set(Task.objects.values_list("status", flat=True)) == {1, 2}
+        assert Task.objects.filter(created_date__isnull=True).count() == 0
+
+    def test_insert_data_spread_over_users(self):
+        users = [
+            User.objects.create_user(email=f"u{i}@gmail.com", password="p")
+            for i in range(2)
+        ]
+        call_command("insert_data", count=200)
+        assert set(Task.objects.values_list("owner", flat=True)) == {
+            user.pk for user in users
+        }
+
+    def test_insert_data_for_owner(self):
+        User.objects.create_user(email="other@gmail.com", password="p")
+        owner = User.objects.create_user(email="mo@gmail.com", password="p")
+        call_command("insert_data", count=20, owner="mo@gmail.com")
+        assert owner.tasks.count() == 20
+
+    def test_insert_data_unknown_owner(self):
+        with pytest.raises(CommandError):
+            call_command("insert_data", owner="nobody@gmail.com")
@@ -0,0 +1,153 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import OperationalError, connections
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core.db import router
+from TodoApp.models import Task
+
+
+@pytest.fixture
+def api_client():
+    client = APIClient()
+    return client
+
+
+@pytest.fixture
+def common_user():
+    user = User.objects.create_user(
+        email="replica@gmail.com", password="m@1234567", is_verified=True
+    )
+    return user
+
+
+@pytest.fixture
+def owner_client(api_client, common_user):
+    api_client.force_authenticate(user=common_user)
+    return api_client
+
+
+def copy_to_replica(user):
+    # with its profile
+    User(id=user.pk, email=user.email, is_verified=True).save(using="replica")
+
+
+@pytest.fixture(autouse=True)
+def replica(settings):
+    # the replica is a second sqlite database, not replicated, so a row
+    # shows which database a request read
+    settings.REPLICA_DATABASES = ["replica"]
+    # writes of earlier tests pinned their user ids to the primary
+    cache.delete_pattern(router.get_pin_key("*"))
+    router.unavailable.clear()
+    yield "replica"
+    router.unavailable.clear()
+    cache.delete_pattern(router.get_pin_key("*"))
+
+
+@pytest.mark.django_db(databases=["default", "replica"])
+class TestReplicaRouter:
+    def test_list_reads_replica(self, owner_client, common_user):
+        Task.objects.create(name="primary", status=1, owner=common_user)
+        copy_to_replica(common_user)
+        Task.objects.using("replica").create(
+            name="replica", status=1, owner_id=common_user.pk
+        )
+        response = owner_client.get(reverse("todoapp:api-v1:task-list"))
+        assert [task["name"] for task in response.data["results"]] == [
+            "replica"
+        ]
+
+    def test_retrieve_reads_replica(self, owner_client, common_user):
+        task = Task.objects.create(name="primary", status=1, owner=common_user)
+        url = reverse("todoapp:api-v1:task-detail", kwargs={"pk": task.pk})
+        assert owner_client.get(url).status_code == 404
+
+    def test_writes_go_to_primary(self, api_client, common_user):
+        api_client.force_authenticate(user=common_user)
+        url = reverse("todoapp:api-v1:task-list")
+        response = api_client.post(url, {"name": "new", "status": 1})
+        assert response.status_code == 201
+        assert Task.objects.filter(name="new").exists()
+        assert not Task.objects.using("replica").exists()
+
+    def test_reads_after_write_pinned_to_primary(self, common_user):
+        url = reverse("todoapp:api-v1:task-list")
+        writer = APIClient()
+        writer.force_authenticate(user=common_user)
+        response = writer.post(url, {"name": "new", "status": 1})
+        assert router.PIN_COOKIE in response.cookies
+        # the cookie pins the client that wrote
+        names = [task["name"] for task in writer.get(url).data["results"]]
+        assert names == ["new"]
+        # the cache marker pins the other clients of the same user
+        other = APIClient()
+        other.force_authenticate(user=common_user)
+        names = [task["name"] for task in other.get(url).data["results"]]
+        assert names == ["new"]
+
+    def test_pin_expires(self, owner_client, common_user):
+        url = reverse("todoapp:api-v1:task-list")
+        Task.objects.create(name="primary", status=1, owner=common_user)
+        owner_client.cookies[router.PIN_COOKIE] = "0"
+        assert owner_client.get(url).data["results"] == []
+
+    def test_failed_replica_falls_back_to_primary(
+        self, owner_client, common_user, monkeypatch
+    ):
+        def fail():
+            raise OperationalError("replica is down")
+
+        monkeypatch.setattr(connections["replica"], "ensure_connection", fail)
+        Task.objects.create(name="primary", status=1, owner=common_user)
+        response = owner_client.get(reverse("todoapp:api-v1:task-list"))
+        assert [task["name"] for task in response.data["results"]] == [
+            "primary"
+        ]
+        # not tried again until REPLICA_RETRY_SECONDS have passed
+        assert not router.is_available("replica")
+        monkeypatch.undo()
+        assert not router.is_available("replica")
+        router.unavailable.clear()
+        assert router.is_available("replica")
+
+    def test_profile_reads_replica(self, api_client, common_user):
+        api_client.force_authenticate(user=common_user)
+        url = reverse("accounts:api-v1:profile")
+        assert api_client.get(url).status_code == 404
+        copy_to_replica(common_user)
+        assert api_client.get(url).status_code == 200
+
+    def test_no_replicas_reads_primary(
+        self, owner_client, common_user, settings
+    ):
+        settings.REPLICA_DATABASES = []
+        Task.objects.create(name="primary", status=1, owner=common_user)
+        response = owner_client.get(reverse("todoapp:api-v1:task-list"))
+        assert len(response.data["results"]) == 1
+
+    def test_outside_requests_use_primary(self):
+        Task.objects.create(name="primary", status=1)
+        assert Task.objects.count() == 1
+
+
+# the async views query the database from another thread
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+class TestReplicaRouterAsync:
+    def test_async_list_reads_replica(self, common_user):
+        Task.objects.create(name="primary", status=1, owner=common_user)
+        copy_to_replica(common_user)
+        Task.objects.using("replica").create(
+            name="replica", status=1, owner_id=common_user.pk
+        )
+        client = AsyncClient()
+        client.force_login(common_user)
+        url = reverse("todoapp:api-v1:async-task-list")
+        response = async_to_sync(client.get)(url)
+        assert [task["name"] for task in response.json()["results"]] == [
+            "replica"
+        ]
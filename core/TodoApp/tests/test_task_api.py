@@ -1,9 +1,33 @@
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 import pytest
+from asgiref.sync import async_to_sync
+from django.db import NotSupportedError, connection
+from django.test import AsyncClient
 from django.urls import reverse
 from accounts.models import User
+from core.asgi import application
 from TodoApp.models import Task
+from TodoApp.api import utils
+from TodoApp.api.utils import (
+    delete_cache,
+    expires_early,
+    get_cache_generation,
+    get_cache_stats,
+    get_user_key_prefix,
+    reset_cache_stats,
+)
+from TodoApp.api.v1.serializers import (
+    STATUS_LABELS,
+    TaskListSerializer,
+    TaskSerializers,
+)
+from TodoApp.api.v1.renderers import NDJSONRenderer
+from TodoApp.api.v1.views import TaskModelViewSet
 from datetime import datetime
+from urllib.parse import urlencode
+import json
+import time
 
 
 @pytest.fixture
@@ -31,11 +55,27 @@ def task_data():
 
 
 @pytest.fixture
-def task_create():
+def other_user():
+    user = User.objects.create_user(
+        email="other@gmail.com", password="m@1234567", is_verified=True
+    )
+    return user
+
+
+@pytest.fixture
+def owner_client(api_client, common_user):
+    # tasks are only listed to their owner
+    api_client.force_authenticate(user=common_user)
+    return api_client
+
+
+@pytest.fixture
+def task_create(common_user):
     data = {
         "name": "test task",
         "status": 1,
         "created_date": datetime.now(),
+        "owner": common_user,
     }
     task_obj = Task.objects.create(**data)
     return task_obj
@@ -164,3 +204,560 @@ class TestTaskApi:
         assert Task.objects.count() == 1
         task = Task.objects.first()
         assert task is not None
+
+
+@pytest.mark.django_db
+class TestTaskOwnership:
+    def test_create_task_owned_by_user(
+        self, api_client, common_user, task_data
+    ):
+        url = reverse("todoapp:api-v1:task-list")
+        api_client.force_authenticate(user=common_user)
+        response = api_client.post(url, task_data, format="json")
+        assert response.status_code == 201
+        assert Task.objects.get().owner == common_user
+
+    def test_bulk_create_tasks_owned_by_user(self, owner_client, common_user):
+        url = reverse("todoapp:api-v1:task-bulk")
+        data = [{"name": f"task {i}", "status": 1} for i in range(3)]
+        response = owner_client.post(url, data, format="json")
+        assert response.status_code == 201
+        assert common_user.tasks.count() == 3
+
+    def test_list_only_own_tasks(self, api_client, other_user, task_create):
+        url = reverse("todoapp:api-v1:task-list")
+        Task.objects.create(name="other task", status=1, owner=other_user)
+        api_client.force_authenticate(user=other_user)
+        response = api_client.get(url)
+        assert [task["name"] for task in response.data["results"]] == [
+            "other task"
+        ]
+
+    def test_anonymous_list_is_empty(self, api_client, task_create):
+        url = reverse("todoapp:api-v1:task-list")
+        response = api_client.get(url)
+        assert response.status_code == 200
+        assert response.data["results"] == []
+
+    def test_other_users_task_response_404_status(
+        self, api_client, other_user, task_create
+    ):
+        url = reverse("todoapp:api-v1:task-detail", args=[task_create.id])
+        api_client.force_authenticate(user=other_user)
+        assert api_client.get(url).status_code == 404
+        response = api_client.patch(url, {"name": "taken"}, format="json")
+        assert response.status_code == 404
+        assert api_client.delete(url).status_code == 404
+        task_create.refresh_from_db()
+        assert task_create.name == "test task"
+
+    def test_bulk_requests_skip_other_users_tasks(
+        self, api_client, other_user, task_create
+    ):
+        url = reverse("todoapp:api-v1:task-bulk")
+        api_client.force_authenticate(user=other_user)
+        data = [{"id": task_create.id, "name": "taken"}]
+        response = api_client.patch(url, data, format="json")
+        assert response.status_code == 400
+        assert "id" in response.data[0]
+        response = api_client.delete(
+            url, {"ids": [task_create.id]}, format="json"
+        )
+        assert response.data["not_found"] == [task_create.id]
+        assert Task.objects.count() == 1
+
+
+@pytest.fixture
+def many_tasks(common_user):
+    Task.objects.bulk_create(
+        Task(name=f"task {i}", status=1 if i % 2 else 2, owner=common_user)
+        for i in range(25)
+    )
+    # give half of the rows the same timestamp to exercise the id tiebreaker
+    same_date = Task.objects.order_by("id")[12].created_date
+    Task.objects.filter(id__lte=Task.objects.order_by("id")[12].id).update(
+        created_date=same_date
+    )
+    return Task.objects.all()
+
+
+@pytest.mark.django_db
+class TestTaskPagination:
+    def collect_ids(self, api_client, url, params=None):
+        ids = []
+        response = api_client.get(url, params)
+        while True:
+            assert response.status_code == 200
+            ids.extend(task["id"] for task in response.data["results"])
+            if response.data["next"] is None:
+                return ids
+            response = api_client.get(response.data["next"])
+
+    def test_list_response_is_paginated(self, owner_client, many_tasks):
+        url = reverse("todoapp:api-v1:task-list")
+        response = owner_client.get(url)
+        assert response.status_code == 200
+        assert len(response.data["results"]) == 20
+        assert response.data["next"] is not None
+        assert response.data["previous"] is None
+
+    def test_cursor_walks_every_task_once(self, owner_client, many_tasks):
+        url = reverse("todoapp:api-v1:task-list")
+        ids = self.collect_ids(owner_client, url, {"page_size": 4})
+        expected = list(
+            many_tasks.order_by("-created_date", "-id").values_list(
+                "id", flat=True
+            )
+        )
+        assert ids == expected
+
+    def test_cursor_with_ordering_and_status_filter(
+        self, owner_client, many_tasks
+    ):
+        url = reverse("todoapp:api-v1:task-list")
+        ids = self.collect_ids(
+            owner_client,
+            url,
+            {"status": 1, "ordering": "created_date", "page_size": 3},
+        )
+        expected = list(
+            many_tasks.filter(status=1)
+            .order_by("created_date", "id")
+            .values_list("id", flat=True)
+        )
+        assert ids == expected
+
+    def test_previous_link_returns_previous_page(
+        self, owner_client, many_tasks
+    ):
+        url = reverse("todoapp:api-v1:task-list")
+        first = owner_client.get(url, {"page_size": 5})
+        second = owner_client.get(first.data["next"])
+        previous = owner_client.get(second.data["previous"])
+        assert previous.data["results"] == first.data["results"]
+
+    def test_invalid_cursor_response_404_status(
+        self, owner_client, many_tasks
+    ):
+        url = reverse("todoapp:api-v1:task-list")
+        response = owner_client.get(url, {"cursor": "cD1ub3QtYS1kYXRl"})
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestTaskListCache:
+    def test_delete_cache_bumps_generation(self):
+        prefix = TaskModelViewSet.CACHE_KEY_PREFIX
+        generation = get_cache_generation(prefix)
+        assert delete_cache(prefix) == generation + 1
+        assert get_cache_generation(prefix) == generation + 1
+
+    def test_list_cache_invalidated_after_create(
+        self, api_client, common_user, task_data
+    ):
+        url = reverse("todoapp:api-v1:task-list")
+        api_client.force_authenticate(user=common_user)
+        assert api_client.get(url).data["results"] == []
+        Task.objects.create(
+            name="not visible yet", status=1, owner=common_user
+        )
+        assert api_client.get(url).data["results"] == []
+        api_client.post(url, task_data, format="json")
+        response = api_client.get(url)
+        assert len(response.data["results"]) == 2
+
+    def test_write_keeps_list_cache_of_other_users(
+        self, api_client, common_user, other_user, task_data
+    ):
+        url = reverse("todoapp:api-v1:task-list")
+        other_client = APIClient()
+        other_client.force_authenticate(user=other_user)
+        assert other_client.get(url)["X-Cache"] == "MISS"
+        api_client.force_authenticate(user=common_user)
+        assert api_client.get(url)["X-Cache"] == "MISS"
+        api_client.post(url, task_data, format="json")
+        assert other_client.get(url)["X-Cache"] == "HIT"
+        response = api_client.get(url)
+        assert response["X-Cache"] == "MISS"
+        assert len(response.data["results"]) == 1
+
+    def test_list_cache_key_ignores_query_param_order(
+        self, owner_client, many_tasks
+    ):
+        url = reverse("todoapp:api-v1:task-list")
+        first = owner_client.get(
+            url + "?status__in=1,2&ordering=created_date&page_size=5"
+        )
+        second = owner_client.get(
+            url + "?page_size=5&ordering=created_date&status__in=2,1&x=1"
+        )
+        assert first["X-Cache"] == "MISS"
+        assert second["X-Cache"] == "HIT"
+        assert second.data == first.data
+
+    def test_list_cache_key_uses_last_repeated_value(
+        self, owner_client, many_tasks
+    ):
+        url = reverse("todoapp:api-v1:task-list")
+        params = {"page_size": 30}
+        both = owner_client.get(url, {**params, "status__in": "1,2"})
+        # the filter reads the last value only
+        repeated = owner_client.get(
+            url + "?page_size=30&status__in=1&status__in=2"
+        )
+        assert repeated["X-Cache"] == "MISS"
+        assert len(both.data["results"]) == 25
+        assert {task["status"] for task in repeated.data["results"]} == {
+            STATUS_LABELS[2]
+        }
+        assert len(repeated.data["results"]) == (
+            many_tasks.filter(status=2).count()
+        )
+        again = owner_client.get(url, {**params, "status__in": "2,1"})
+        assert again["X-Cache"] == "HIT"
+        assert again.data == both.data
+
+    def test_list_cache_is_per_user(self, api_client, common_user, many_tasks):
+        url = reverse("todoapp:api-v1:task-list")
+        assert api_client.get(url)["X-Cache"] == "MISS"
+        api_client.force_authenticate(user=common_user)
+        assert api_client.get(url)["X-Cache"] == "MISS"
+        assert api_client.get(url)["X-Cache"] == "HIT"
+
+    def test_list_cache_counts_hits_and_misses(self, owner_client, many_tasks):
+        url = reverse("todoapp:api-v1:task-list")
+        prefix = TaskModelViewSet.CACHE_KEY_PREFIX
+        reset_cache_stats(prefix)
+        for _ in range(3):
+            owner_client.get(url)
+        stats = get_cache_stats(prefix)
+        assert stats["misses"] == 1
+        assert stats["hits"] == 2
+
+    def test_list_cache_serves_stale_while_regenerating(
+        self, owner_client, common_user, many_tasks, monkeypatch
+    ):
+        url = reverse("todoapp:api-v1:task-list")
+        first = owner_client.get(url)
+        delete_cache(
+            get_user_key_prefix(TaskModelViewSet.CACHE_KEY_PREFIX, common_user)
+        )
+        add = utils.cache.add
+
+        def locked_add(key, *args, **kwargs):
+            # another reader holds the regeneration lock
+            if key.endswith(".lock"):
+                return False
+            return add(key, *args, **kwargs)
+
+        monkeypatch.setattr(utils.cache, "add", locked_add)
+        response = owner_client.get(url)
+        assert response["X-Cache"] == "STALE"
+        assert response.data == first.data
+
+    def test_list_cache_recomputed_early(
+        self, owner_client, many_tasks, monkeypatch
+    ):
+        url = reverse("todoapp:api-v1:task-list")
+        assert owner_client.get(url)["X-Cache"] == "MISS"
+        monkeypatch.setattr(utils, "expires_early", lambda entry, beta: True)
+        assert owner_client.get(url)["X-Cache"] == "MISS"
+
+    def test_expires_early_near_expiry(self):
+        now = time.time()
+        fresh = {"delta": 0.01, "expires": now + 300}
+        expiring = {"delta": 0.01, "expires": now - 1}
+        assert not any(expires_early(fresh, beta=1.0) for _ in range(100))
+        assert all(expires_early(expiring, beta=1.0) for _ in range(100))
+
+
+@pytest.mark.django_db
+class TestTaskBulkApi:
+    def test_bulk_create_response_201_status(self, api_client, common_user):
+        url = reverse("todoapp:api-v1:task-bulk")
+        api_client.force_login(user=common_user)
+        data = [{"name": f"task {i}", "status": 1 + i % 2} for i in range(50)]
+        response = api_client.post(url, data, format="json")
+        assert response.status_code == 201
+        assert len(response.data) == 50
+        assert Task.objects.count() == 50
+        assert Task.objects.filter(status=2).count() == 25
+        tasks = Task.objects.in_bulk([task["id"] for task in response.data])
+        assert [tasks[task["id"]].name for task in response.data] == [
+            task["name"] for task in data
+        ]
+
+    def test_bulk_create_ids_across_batches(
+        self, api_client, common_user, monkeypatch
+    ):
+        monkeypatch.setattr(TaskListSerializer, "batch_size", 3)
+        Task.objects.create(name="existing", status=1, owner=common_user)
+        url = reverse("todoapp:api-v1:task-bulk")
+        api_client.force_login(user=common_user)
+        data = [{"name": f"task {i}", "status": 1} for i in range(7)]
+        response = api_client.post(url, data, format="json")
+        assert response.status_code == 201
+        ids = [task["id"] for task in response.data]
+        assert None not in ids
+        assert [Task.objects.get(pk=pk).name for pk in ids] == [
+            task["name"] for task in data
+        ]
+
+    def test_bulk_create_refused_without_returning_ids(
+        self, common_user, monkeypatch
+    ):
+        # a backend without RETURNING and with concurrent writers
+        monkeypatch.setattr(connection, "vendor", "mysql")
+        monkeypatch.setattr(
+            connection.features, "can_return_rows_from_bulk_insert", False
+        )
+        serializer = TaskSerializers(
+            data=[{"name": "task", "status": 1}], many=True
+        )
+        assert serializer.is_valid()
+        with pytest.raises(NotSupportedError):
+            serializer.save(owner_id=common_user.pk)
+        assert Task.objects.count() == 0
+
+    def test_bulk_create_reports_item_errors_response_400_status(
+        self, api_client, common_user
+    ):
+        url = reverse("todoapp:api-v1:task-bulk")
+        api_client.force_login(user=common_user)
+        data = [
+            {"name": "valid task", "status": 1},
+            {"name": "no status"},
+            {"name": "valid task", "status": 2},
+        ]
+        response = api_client.post(url, data, format="json")
+        assert response.status_code == 400
+        assert response.data[0] == {}
+        assert "status" in response.data[1]
+        assert response.data[2] == {}
+        assert Task.objects.count() == 0
+
+    def test_bulk_create_not_a_list_response_400_status(
+        self, api_client, common_user
+    ):
+        url = reverse("todoapp:api-v1:task-bulk")
+        api_client.force_login(user=common_user)
+        data = {"name": "task", "status": 1}
+        response = api_client.post(url, data, format="json")
+        assert response.status_code == 400
+
+    def test_bulk_create_unauthorized_response_401_status(self, api_client):
+        url = reverse("todoapp:api-v1:task-bulk")
+        data = [{"name": "task", "status": 1}]
+        response = api_client.post(url, data, format="json")
+        assert response.status_code == 401
+        assert Task.objects.count() == 0
+
+    def test_bulk_update_response_200_status(
+        self, api_client, common_user, many_tasks
+    ):
+        url = reverse("todoapp:api-v1:task-bulk")
+        api_client.force_login(user=common_user)
+        ids = list(many_tasks.values_list("id", flat=True)[:10])
+        data = [{"id": pk, "name": "edited", "status": 2} for pk in ids]
+        response = api_client.put(url, data, format="json")
+        assert response.status_code == 200
+        assert Task.objects.filter(id__in=ids, name="edited").count() == 10
+        assert Task.objects.filter(id__in=ids, status=2).count() == 10
+
+    def test_bulk_partial_update_response_200_status(
+        self, api_client, common_user, task_create
+    ):
+        url = reverse("todoapp:api-v1:task-bulk")
+        api_client.force_login(user=common_user)
+        data = [{"id": task_create.id, "name": "edited by patch"}]
+        response = api_client.patch(url, data, format="json")
+        assert response.status_code == 200
+        task_create.refresh_from_db()
+        assert task_create.name == "edited by patch"
+        assert task_create.status == 1
+
+    def test_bulk_update_unknown_id_response_400_status(
+        self, api_client, common_user, task_create
+    ):
+        url = reverse("todoapp:api-v1:task-bulk")
+        api_client.force_login(user=common_user)
+        data = [
+            {"id": task_create.id, "name": "edited", "status": 2},
+            {"id": task_create.id + 1000, "name": "edited", "status": 2},
+            {"id": task_create.id, "name": "edited", "status": 2},
+        ]
+        response = api_client.put(url, data, format="json")
+        assert response.status_code == 400
+        assert response.data[0] == {}
+        assert "id" in response.data[1]
+        assert "id" in response.data[2]
+        task_create.refresh_from_db()
+        assert task_create.name == "test task"
+
+    def test_bulk_delete_response_200_status(
+        self, api_client, common_user, many_tasks
+    ):
+        url = reverse("todoapp:api-v1:task-bulk")
+        api_client.force_login(user=common_user)
+        ids = list(many_tasks.values_list("id", flat=True)[:5])
+        data = {"ids": ids + [max(ids) + 1000]}
+        response = api_client.delete(url, data, format="json")
+        assert response.status_code == 200
+        assert response.data["deleted"] == 5
+        assert response.data["not_found"] == [max(ids) + 1000]
+        assert Task.objects.count() == 20
+
+    def test_bulk_delete_unauthorized_response_401_status(
+        self, api_client, task_create
+    ):
+        url = reverse("todoapp:api-v1:task-bulk")
+        data = {"ids": [task_create.id]}
+        response = api_client.delete(url, data, format="json")
+        assert response.status_code == 401
+        assert Task.objects.count() == 1
+
+
+@pytest.mark.django_db
+class TestTaskExportApi:
+    def read_lines(self, response):
+        content = b"".join(response.streaming_content).decode()
+        return content.splitlines()
+
+    def test_export_ndjson_response_200_status(self, owner_client, many_tasks):
+        url = reverse("todoapp:api-v1:task-export")
+        response = owner_client.get(url)
+        assert response.status_code == 200
+        assert response.streaming
+        assert response["Content-Type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in self.read_lines(response)]
+        assert [row["id"] for row in rows] == list(
+            many_tasks.order_by("id").values_list("id", flat=True)
+        )
+        assert rows[0]["status"] in dict(Task.task_status).values()
+
+    def test_export_csv_with_status_filter_response_200_status(
+        self, owner_client, many_tasks
+    ):
+        url = reverse("todoapp:api-v1:task-export")
+        response = owner_client.get(url, {"format": "csv", "status": 2})
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/csv")
+        lines = self.read_lines(response)
+        assert lines[0] == "id,name,status,created_date"
+        assert len(lines) - 1 == many_tasks.filter(status=2).count()
+
+    def test_export_csv_ordering(self, owner_client, many_tasks):
+        url = reverse("todoapp:api-v1:task-export")
+        response = owner_client.get(
+            url, {"format": "csv", "ordering": "-created_date"}
+        )
+        dates = [line.split(",")[-1] for line in self.read_lines(response)[1:]]
+        assert dates == sorted(dates, reverse=True)
+
+
+def asgi_get(path, headers=()):
+    """
+    Send a GET through the ASGI application the uvicorn workers serve,
+    which sends streaming responses from its event loop.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"testserver"), *headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    async_to_sync(application)(scope, receive, send)
+    status = messages[0]["status"]
+    parts = [message.get("body", b"") for message in messages[1:]]
+    return status, parts
+
+
+# the asgi application queries the database from other threads
+@pytest.mark.django_db(transaction=True)
+class TestTaskExportAsgi:
+    def test_export_under_asgi(self, common_user, many_tasks, monkeypatch):
+        monkeypatch.setattr(NDJSONRenderer, "chunk_size", 10)
+        token = AccessToken.for_user(common_user)
+        status, parts = asgi_get(
+            reverse("todoapp:api-v1:task-export"),
+            [(b"authorization", f"Bearer {token}".encode())],
+        )
+        assert status == 200
+        # sent a chunk of rows at a time, not rendered in one piece
+        assert [part.count(b"\n") for part in parts] == [10, 10, 5, 0]
+        body = b"".join(parts)
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        assert [row["id"] for row in rows] == list(
+            many_tasks.order_by("id").values_list("id", flat=True)
+        )
+
+
+@pytest.fixture
+def async_client(common_user):
+    client = AsyncClient()
+    client.force_login(common_user)
+    return client
+
+
+# the views query the database from another thread, so the tasks must be
+# committed instead of living in the test transaction
+@pytest.mark.django_db(transaction=True)
+class TestTaskAsyncApi:
+    def get(self, async_client, url, params=None):
+        # the async client of django 3.2 drops the data of get requests
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        return async_to_sync(async_client.get)(url)
+
+    def test_async_list_matches_sync_list(
+        self, owner_client, async_client, many_tasks
+    ):
+        params = {"status": 1, "page_size": 5}
+        response = self.get(
+            async_client, reverse("todoapp:api-v1:async-task-list"), params
+        )
+        assert response.status_code == 200
+        data = response.json()
+        expected = owner_client.get(
+            reverse("todoapp:api-v1:task-list"), params
+        ).json()
+        assert [task["id"] for task in data["results"]] == [
+            task["id"] for task in expected["results"]
+        ]
+        assert "/async/task/" in data["next"]
+
+    def test_async_retrieve_response_200_status(
+        self, async_client, task_create
+    ):
+        url = reverse(
+            "todoapp:api-v1:async-task-detail", kwargs={"pk": task_create.pk}
+        )
+        response = self.get(async_client, url)
+        assert response.status_code == 200
+        assert response.json()["name"] == "test task"
+
+    def test_async_retrieve_response_404_status(self, async_client):
+        url = reverse("todoapp:api-v1:async-task-detail", kwargs={"pk": 1})
+        response = self.get(async_client, url)
+        assert response.status_code == 404
+
+    def test_async_list_post_response_405_status(self, async_client):
+        url = reverse("todoapp:api-v1:async-task-list")
+        response = async_to_sync(async_client.post)(url, {"name": "task"})
+        assert response.status_code == 405
@@ -1,6 +1,13 @@
 import pytest
+from django.apps import apps
+from django.db import connection
+from accounts.models import User
 from TodoApp.models import Task
 from datetime import datetime
+from importlib import import_module
+from types import SimpleNamespace
+
+backfill = import_module("TodoApp.migrations.0005_task_owner_backfill")
 
 
 @pytest.mark.django_db
@@ -24,3 +31,44 @@ class TestTaskModel:
             assert task is None
         except Exception:
             assert True
+
+
+@pytest.mark.django_db
+class TestTaskOwnerBackfill:
+    def run_backfill(self, batch_size):
+        schema_editor = SimpleNamespace(connection=connection)
+        backfill.assign_owners(apps, schema_editor, batch_size=batch_size)
+
+    def test_tasks_given_to_configured_owner(self, settings):
+        User.objects.create_superuser(email="admin@gmail.com", password="p")
+        owner = User.objects.create_user(email="user@gmail.com", password="p")
+        settings.TASK_ORPHAN_OWNER = "user@gmail.com"
+        Task.objects.bulk_create(
+            Task(name=f"task {i}", status=1) for i in range(25)
+        )
+        self.run_backfill(batch_size=7)
+        assert owner.tasks.count() == 25
+
+    def test_owned_tasks_kept(self, settings):
+        user = User.objects.create_user(email="user@gmail.com", password="p")
+        other = User.objects.create_user(email="other@gmail.com", password="p")
+        settings.TASK_ORPHAN_OWNER = "user@gmail.com"
+        Task.objects.create(name="owned", status=1, owner=other)
+        Task.objects.create(name="orphan", status=1)
+        self.run_backfill(batch_size=1)
+        assert Task.objects.get(name="owned").owner == other
+        assert Task.objects.get(name="orphan").owner == user
+
+    def test_orphans_left_without_owner(self, settings):
+        User.objects.create_superuser(email="admin@gmail.com", password="p")
+        settings.TASK_ORPHAN_OWNER = ""
+        Task.objects.create(name="orphan", status=1)
+        self.run_backfill(batch_size=10)
+        assert Task.objects.get().owner is None
+
+    def test_unknown_owner_refused(self, settings):
+        settings.TASK_ORPHAN_OWNER = "nobody@gmail.com"
+        Task.objects.create(name="orphan", status=1)
+        with pytest.raises(User.DoesNotExist):
+            self.run_backfill(batch_size=10)
+        assert Task.objects.get().owner is None
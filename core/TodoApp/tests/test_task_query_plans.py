@@ -0,0 +1,126 @@
+import re
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from TodoApp.models import Task
+from TodoApp.api.v1.views import TaskModelViewSet
+
+# every filter + ordering combination the task api supports
+QUERY_SHAPES = [
+    {},
+    {"ordering": "created_date"},
+    {"ordering": "-created_date"},
+    {"status": 1},
+    {"status": 1, "ordering": "created_date"},
+    {"status__in": "1,2"},
+    {"status__in": "1,2", "ordering": "created_date"},
+]
+
+
+@pytest.fixture
+def owner():
+    user = User.objects.create_user(
+        email="owner@gmail.com", password="m@1234567", is_verified=True
+    )
+    return user
+
+
+@pytest.fixture
+def api_client(owner):
+    # every query is scoped to the tasks of the requesting user
+    client = APIClient()
+    client.force_authenticate(user=owner)
+    return client
+
+
+@pytest.fixture
+def tasks(owner):
+    other = User.objects.create_user(
+        email="other@gmail.com", password="m@1234567"
+    )
+    Task.objects.bulk_create(
+        Task(
+            name=f"task {i}", status=1 + i % 2, owner=owner if i % 3 else other
+        )
+        for i in range(50)
+    )
+    return Task.objects.filter(owner=owner)
+
+
+def explain(sql):
+    """
+    Return the query plan lines of the given sql for the current database.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # only pick a seq scan when no index can be used at all, for
+            # this query and not the ones run after it on the connection
+            cursor.execute("SET enable_seqscan = off")
+            try:
+                cursor.execute(f"EXPLAIN {sql}")
+                return [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.execute("RESET enable_seqscan")
+        if connection.vendor == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return [row[-1] for row in cursor.fetchall()]
+    pytest.skip(f"no query plan check for {connection.vendor}")
+
+
+def is_sequential_scan(line):
+    if connection.vendor == "postgresql":
+        return "Seq Scan" in line
+    # sqlite: "SCAN table" without "USING ... INDEX" reads the whole table
+    return bool(re.match(r"^SCAN \S+$", line.strip()))
+
+
+def task_queries(api_client, url, params):
+    cache.delete_pattern(f"{TaskModelViewSet.CACHE_KEY_PREFIX}.*")
+    table = Task._meta.db_table
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get(url, params)
+        if response.streaming:
+            b"".join(response.streaming_content)
+    assert response.status_code == 200
+    queries = [
+        query["sql"]
+        for query in context.captured_queries
+        if query["sql"].startswith("SELECT") and table in query["sql"]
+    ]
+    assert queries
+    return response, queries
+
+
+def assert_no_sequential_scan(queries):
+    for sql in queries:
+        plan = explain(sql)
+        scans = [line for line in plan if is_sequential_scan(line)]
+        assert not scans, f"sequential scan in {sql}\n" + "\n".join(plan)
+
+
+@pytest.mark.django_db
+class TestTaskQueryPlans:
+    @pytest.mark.parametrize("params", QUERY_SHAPES)
+    def test_list_uses_index(self, api_client, tasks, params):
+        url = reverse("todoapp:api-v1:task-list")
+        _, queries = task_queries(api_client, url, params)
+        assert_no_sequential_scan(queries)
+
+    @pytest.mark.parametrize("params", QUERY_SHAPES)
+    def test_list_next_page_uses_index(self, api_client, tasks, params):
+        url = reverse("todoapp:api-v1:task-list")
+        response, _ = task_queries(api_client, url, {**params, "page_size": 5})
+        _, queries = task_queries(api_client, response.data["next"], {})
+        assert_no_sequential_scan(queries)
+
+    @pytest.mark.parametrize("params", QUERY_SHAPES)
+    def test_export_uses_index(self, api_client, tasks, params):
+        url = reverse("todoapp:api-v1:task-export")
+        _, queries = task_queries(api_client, url, params)
+        assert_no_sequential_scan(queries)
@@ -0,0 +1,72 @@
+import os
+import time
+
+import pytest
+from django.utils import timezone
+from rest_framework import serializers
+
+from TodoApp.models import Task
+from TodoApp.api.v1.serializers import TaskSerializers, TaskReadSerializer
+
+
+class LegacyTaskSerializer(serializers.ModelSerializer):
+    """
+    task serializer as it was before the fast path, kept as the baseline
+    of the benchmark.
+    """
+
+    class Meta:
+        model = Task
+        fields = ["id", "name", "status", "created_date"]
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        representation["status"] = instance.get_status_display()
+        return representation
+
+
+def make_tasks(count):
+    now = timezone.now()
+    return [
+        Task(id=i, name=f"task {i}", status=1 + i % 2, created_date=now)
+        for i in range(1, count + 1)
+    ]
+
+
+def rows_per_second(serializer_class, tasks):
+    started = time.perf_counter()
+    serializer_class(tasks, many=True).data
+    return len(tasks) / (time.perf_counter() - started)
+
+
+class TestTaskSerializer:
+    def test_read_serializer_matches_model_serializer(self):
+        tasks = make_tasks(10)
+        expected = LegacyTaskSerializer(tasks, many=True).data
+        assert TaskSerializers(tasks, many=True).data == expected
+        assert TaskReadSerializer(tasks, many=True).data == expected
+
+    def test_read_serializer_fields_in_schema(self):
+        fields = TaskReadSerializer().get_fields()
+        assert list(fields) == ["id", "name", "status", "created_date"]
+        assert all(
+            type(field) is type(TaskSerializers().fields[name])
+            for name, field in fields.items()
+        )
+
+    @pytest.mark.skipif(
+        not os.environ.get("RUN_BENCHMARKS"),
+        reason="set RUN_BENCHMARKS=1 to run benchmarks",
+    )
+    @pytest.mark.parametrize("count", [10000, 100000])
+    def test_serializer_benchmark(self, count):
+        tasks = make_tasks(count)
+        before = rows_per_second(LegacyTaskSerializer, tasks)
+        model = rows_per_second(TaskSerializers, tasks)
+        after = rows_per_second(TaskReadSerializer, tasks)
+        print(
+            f"\n{count} tasks: legacy {before:,.0f} rows/s, "
+            f"TaskSerializers {model:,.0f} rows/s, "
+            f"TaskReadSerializer {after:,.0f} rows/s"
+        )
+        assert after > before
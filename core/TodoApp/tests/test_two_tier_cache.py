@@ -0,0 +1,170 @@
+import time
+
+import pytest
+from django.conf import settings
+from django_redis.cache import RedisCache
+
+from core.cache import MISSING, LRUCache
+
+
+def make_cache():
+    return RedisCache(
+        settings.CACHES["default"]["LOCATION"],
+        {
+            "KEY_PREFIX": "test-two-tier",
+            "OPTIONS": {
+                "CLIENT_CLASS": "core.cache.TwoTierClient",
+                "L1_KEY_PREFIXES": ["hot."],
+                "L1_TIMEOUT": 60,
+            },
+        },
+    )
+
+
+def subscribe(cache):
+    cache.client.start_subscriber()
+    assert cache.client.tier.subscribed.wait(2)
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def sync(*caches):
+    # messages come in order, once a probe is dropped everywhere the
+    # invalidations published before it are too
+    key = str(caches[0].client.make_key("hot.sync"))
+    for cache in caches:
+        cache.client.tier.l1.set(key, 1, 1)
+    caches[0].client.publish(key)
+    for cache in caches:
+        wait_for(lambda: cache.client.tier.l1.get(key) is MISSING)
+
+
+@pytest.fixture
+def worker_caches(monkeypatch):
+    # two caches stand for the caches of two gunicorn workers, each worker
+    # process has tiers of its own
+    caches = []
+    for _ in range(2):
+        monkeypatch.setattr("core.cache.TIERS", {})
+        cache = make_cache()
+        subscribe(cache)
+        caches.append(cache)
+    yield caches
+    caches[0].delete_pattern("*")
+    caches[0].client.reset_tier_stats()
+
+
+class TestTwoTierCache:
+    def test_hot_key_served_from_l1(self, worker_caches):
+        cache = worker_caches[0]
+        cache.set("hot.key", {"results": [1, 2]})
+        sync(cache)
+        first = cache.get("hot.key")
+        second = cache.get("hot.key")
+        assert first == second == {"results": [1, 2]}
+        assert cache.client.tier.stats["l2_hits"] == 1
+        assert cache.client.tier.stats["l1_hits"] == 1
+
+    def test_other_keys_bypass_l1(self, worker_caches):
+        cache = worker_caches[0]
+        cache.set("cold.key", 1)
+        assert cache.get("cold.key") == 1
+        assert len(cache.client.tier.l1) == 0
+
+    def test_write_in_other_worker_invalidates_l1(self, worker_caches):
+        reader, writer = worker_caches
+        reader.set("hot.generation", 1)
+        sync(*worker_caches)
+        assert reader.get("hot.generation") == 1
+        key = str(reader.client.make_key("hot.generation"))
+        assert reader.client.tier.l1.get(key) == 1
+
+        writer.incr("hot.generation")
+        wait_for(lambda: reader.client.tier.l1.get(key) is MISSING)
+        assert reader.get("hot.generation") == 2
+
+        writer.delete("hot.generation")
+        wait_for(lambda: reader.client.tier.l1.get(key) is MISSING)
+        assert reader.get("hot.generation") is None
+
+    def test_own_write_drops_value_read_back(self, worker_caches):
+        cache = worker_caches[0]
+        key = str(cache.client.make_key("hot.key"))
+        pipeline = cache.client.get_client(write=True).pipeline()
+        cache.set("hot.key", 2, client=pipeline)
+        # a reader puts back the value replaced before the write is done
+        cache.client.tier.l1.set(key, 1, 1)
+        pipeline.execute()
+        wait_for(lambda: cache.client.tier.l1.get(key) is MISSING)
+        assert cache.get("hot.key") == 2
+
+    def test_delete_pattern_drops_own_l1(self, worker_caches):
+        cache = worker_caches[0]
+        cache.set("hot.key", 1)
+        assert cache.get("hot.key") == 1
+        cache.delete_pattern("hot.*")
+        # at once, not when its own message comes back
+        assert len(cache.client.tier.l1) == 0
+        assert cache.get("hot.key") is None
+
+    def test_caches_of_one_process_share_l1(self, worker_caches):
+        # django builds a cache per thread, and per request under asgi
+        cache = worker_caches[1]
+        other = make_cache()
+        assert other.client.tier is cache.client.tier
+        assert other.client.start_subscriber()
+        cache.set("hot.key", 1)
+        sync(cache)
+        assert cache.get("hot.key") == 1
+        assert other.get("hot.key") == 1
+        assert cache.client.tier.stats["l1_hits"] == 1
+
+    def test_tier_stats_of_all_workers(self, worker_caches):
+        first, second = worker_caches
+        first.set("hot.key", 1)
+        sync(*worker_caches)
+        for cache in worker_caches:
+            cache.get("hot.key")
+            cache.get("hot.key")
+            cache.get("hot.missing")
+            cache.client.flush_stats()
+        stats = first.client.get_tier_stats()
+        assert stats["l1_hits"] == 2
+        assert stats["l2_hits"] == 2
+        assert stats["misses"] == 2
+        assert stats["l1_hit_ratio"] == pytest.approx(1 / 3)
+
+
+class TestLRUCache:
+    def test_least_recently_used_evicted_by_count(self):
+        lru = LRUCache(max_entries=2, max_bytes=100, timeout=60)
+        lru.set("a", 1, size=1)
+        lru.set("b", 2, size=1)
+        lru.get("a")
+        lru.set("c", 3, size=1)
+        assert lru.get("b") is MISSING
+        assert lru.get("a") == 1
+        assert lru.get("c") == 3
+
+    def test_evicted_by_size(self):
+        lru = LRUCache(max_entries=10, max_bytes=10, timeout=60)
+        lru.set("a", 1, size=4)
+        lru.set("b", 2, size=4)
+        lru.set("c", 3, size=4)
+        assert lru.get("a") is MISSING
+        assert lru.size == 8
+        lru.set("too-big", 4, size=11)
+        assert lru.get("too-big") is MISSING
+        assert len(lru) == 2
+
+    def test_entries_expire(self):
+        lru = LRUCache(timeout=0.01)
+        lru.set("a", 1, size=1)
+        time.sleep(0.02)
+        assert lru.get("a") is MISSING
+        assert lru.size == 0
@@ -1,11 +1,151 @@
-import threading
+import functools
+import logging
+from time import sleep
 
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template import Context
+from django.template.loader import get_template
+from django.template.loader_tags import BlockNode
+from rest_framework_simplejwt.tokens import RefreshToken
 
-class EmailThread(threading.Thread):
-    def __init__(self, email_obj):
-        # calling parent class constructor
-        threading.Thread.__init__(self)
-        self.email_obj = email_obj
+logger = logging.getLogger(__name__)
 
-    def run(self):
-        self.email_obj.send()
+
+class EmailDeliveryError(Exception):
+    """
+    A batch of emails could not be sent, even after retries.
+    """
+
+
+def send_messages(messages, backend=None, max_retries=3, retry_delay=1.0):
+    """
+    Send messages over one mail connection with a single send_messages
+    call. A failed attempt is retried on a new connection with exponential
+    backoff, EmailDeliveryError is raised when the last retry fails.
+    """
+    for attempt in range(max_retries + 1):
+        connection = get_connection(backend)
+        try:
+            connection.open()
+            connection.send_messages(messages)
+            return
+        except Exception:
+            logger.exception(
+                "sending %d emails failed, attempt %d",
+                len(messages),
+                attempt + 1,
+            )
+        finally:
+            close_connection(connection)
+        if attempt < max_retries:
+            sleep(retry_delay * 2**attempt)
+    raise EmailDeliveryError(
+        f"sending {len(messages)} emails failed after retries"
+    )
+
+
+def close_connection(connection):
+    try:
+        connection.close()
+    except Exception:
+        logger.exception("closing mail connection failed")
+
+
+def get_tokens_for_user(user):
+    refresh = RefreshToken.for_user(user)
+    return str(refresh.access_token)
+
+
+EMAIL_FORMATS = ("activation", "reset_password")
+
+
+class CompiledEmailTemplate:
+    """
+    A mail_templated email template compiled once.
+
+    mail_templated renders the whole base template for every message and
+    searches the output for the subject, body and html markers. Here the
+    nodes of each block are looked up once and rendered directly, with the
+    same escaping: only the html block is autoescaped. `{{ block.super }}`
+    is not supported.
+    """
+
+    block_names = ("subject", "body", "html")
+
+    def __init__(self, template_name):
+        self.template = get_template(template_name).template
+        blocks = {
+            node.name: node
+            for node in self.template.nodelist.get_nodes_by_type(BlockNode)
+        }
+        self.nodelists = {
+            name: blocks[name].nodelist
+            for name in self.block_names
+            if name in blocks
+        }
+
+    def render(self, context):
+        context = Context(context)
+        parts = dict.fromkeys(self.block_names, "")
+        with context.bind_template(self.template):
+            for name, nodelist in self.nodelists.items():
+                context.autoescape = name == "html"
+                parts[name] = nodelist.render(context).strip("\n\r")
+        return parts
+
+    def build_message(self, context, *args, **kwargs):
+        parts = self.render(context)
+        message = EmailMultiAlternatives(
+            parts["subject"], parts["body"], *args, **kwargs
+        )
+        if parts["html"] and not parts["body"]:
+            message.body = parts["html"]
+            message.content_subtype = "html"
+        elif parts["html"]:
+            message.attach_alternative(parts["html"], "text/html")
+        return message
+
+
+@functools.lru_cache(maxsize=None)
+def get_email_template(email_format):
+    return CompiledEmailTemplate("email/%s.tpl" % email_format)
+
+
+def warm_email_templates():
+    """
+    Compile every email template up front, called when a worker starts so
+    the first batch does not pay for it.
+    """
+    for email_format in EMAIL_FORMATS:
+        get_email_template(email_format)
+
+
+def build_email(user, email_format):
+    return get_email_template(email_format).build_message(
+        {"token": get_tokens_for_user(user)},
+        "admin@admin.com",
+        to=[user.email],
+    )
+
+
+def send_emails(pending):
+    """
+    Send the emails of a list of (user_id, email_format) pairs over one
+    connection, users are loaded with a single query. Returns the number
+    of emails handed to the mail backend, raises EmailDeliveryError when
+    the backend keeps failing.
+    """
+    users = get_user_model().objects.in_bulk(
+        {user_id for user_id, _ in pending}
+    )
+    messages = []
+    for user_id, email_format in pending:
+        user = users.get(user_id)
+        if user is None:
+            logger.warning("user %s no longer exists, email dropped", user_id)
+            continue
+        messages.append(build_email(user, email_format))
+    if messages:
+        send_messages(messages)
+    return len(messages)
@@ -4,6 +4,7 @@ from django.contrib.auth.password_validation import validate_password
 from django.core import exceptions
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from ...models import Profile
+from ...claims import get_claims_version
 
 
 class RegistrationSerializer(serializers.ModelSerializer):
@@ -32,6 +33,14 @@ class RegistrationSerializer(serializers.ModelSerializer):
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        # claims read by accounts.authentication.ClaimsJWTAuthentication
+        token = super().get_token(user)
+        token["is_verified"] = user.is_verified
+        token["claims_version"] = get_claims_version(user.pk)
+        return token
+
     def validate(self, attrs):
         validated_data = super().validate(attrs)
         if not self.user.is_verified:
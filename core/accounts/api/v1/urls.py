@@ -73,4 +73,10 @@ urlpatterns = [
         views.ResetPasswordConfirmation.as_view(),
         name="reset-password-confirmation",
     ),
+    # authentication metrics
+    path(
+        "auth-metrics/",
+        views.AuthenticationMetricsApiView.as_view(),
+        name="auth-metrics",
+    ),
 ]
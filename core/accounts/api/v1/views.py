@@ -3,9 +3,9 @@ from rest_framework.response import Response
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.tokens import RefreshToken
 
 import jwt
 from jwt.exceptions import (
@@ -14,10 +14,9 @@ from jwt.exceptions import (
     DecodeError,
 )
 
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.conf import settings
-from mail_templated import EmailMessage
-from ..utils import EmailThread
 
 
 from .serializers import (
@@ -31,46 +30,43 @@ from .serializers import (
 from django.contrib.auth import get_user_model
 from ...models import Profile
 from accounts.permissions import IsVerified
+from accounts.authentication import authentication_metrics
+from accounts.tasks import queue_email
+from core.db.router import ReplicaReadMixin
 
 User = get_user_model()
 
 
 # TODO:send email function for multiple views
-def send_email(email, email_format):
-    user_obj = get_object_or_404(User, email=email)
-    token = get_tokens_for_user(user_obj)
-    email_obj = EmailMessage(
-        "email/%s.tpl" % email_format,
-        {"token": token},
-        "admin@admin.com",
-        to=[email],
-    )
-    EmailThread(email_obj).start()
-
-
-# TODO:generate token for user for send email function
-def get_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
-    return str(refresh.access_token)
+def send_email(user_id, email_format):
+    # token and rendering are done by the celery worker, once committed
+    transaction.on_commit(lambda: queue_email(user_id, email_format))
 
 
 # TODO:register user and send email for activation
 class RegistrationApiView(generics.GenericAPIView):
     serializer_class = RegistrationSerializer
+    throttle_scope = "register"
+    throttle_account_field = "email"
 
     def post(self, request, *args, **kwargs):
         serializer = RegistrationSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            user = serializer.save()
             email = serializer.validated_data["email"]
             data = {"email": email}
-            send_email(email, email_format="activation")
+            send_email(user.pk, email_format="activation")
             return Response(data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 # TODO:generate token
 class CustomobtainAuthToken(ObtainAuthToken):
+    # ObtainAuthToken sets no throttles of its own
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    throttle_scope = "login"
+    throttle_account_field = "username"
+
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(
             data=request.data, context={"request": request}
@@ -95,6 +91,8 @@ class CustomDiscardAuthToken(APIView):
 # TODO:generate jwt token
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_scope = "login"
+    throttle_account_field = "email"
 
 
 # TODO:user can change password in account
@@ -130,7 +128,7 @@ class ChangePasswordApiView(generics.GenericAPIView):
 
 
 # TODO:show profile in account and user can change profile information
-class ProfileApiView(generics.RetrieveUpdateAPIView):
+class ProfileApiView(ReplicaReadMixin, generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated, IsVerified]
     serializer_class = ProfileSerializer
     queryset = Profile.objects.all()
@@ -146,8 +144,7 @@ class VerficationEmailApiView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        self.email = request.user.email
-        send_email(self.email, email_format="activation")
+        send_email(request.user.pk, email_format="activation")
         return Response("email sent")
 
 
@@ -191,6 +188,8 @@ class ActivationApiView(APIView):
 # TODO:resend activation email for verify users
 class ActivationResendApiView(generics.GenericAPIView):
     serializer_class = ActivationEmailSerializer
+    throttle_scope = "email"
+    throttle_account_field = "email"
 
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
@@ -201,7 +200,7 @@ class ActivationResendApiView(generics.GenericAPIView):
                 {"details": "user is already activated and verified"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        send_email(user_obj.email, email_format="activation")
+        send_email(user_obj.pk, email_format="activation")
         return Response(
             {"details": "user activation resend successfully"},
             status=status.HTTP_200_OK,
@@ -211,13 +210,15 @@ class ActivationResendApiView(generics.GenericAPIView):
 # TODO:send email for reset password when user is verified and can not login
 class ResetPasswordEmailApiView(generics.GenericAPIView):
     serializer_class = ActivationEmailSerializer
+    throttle_scope = "email"
+    throttle_account_field = "email"
 
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
         user_obj = serializer.validated_data["user"]
         if user_obj.is_verified:
-            send_email(user_obj.email, email_format="reset_password")
+            send_email(user_obj.pk, email_format="reset_password")
             return Response(
                 {"details": "reset password link send successfully"},
                 status=status.HTTP_200_OK,
@@ -264,3 +265,11 @@ class ResetPasswordConfirmation(generics.GenericAPIView):
             {"detail": "password changes successfully"},
             status=status.HTTP_200_OK,
         )
+
+
+# TODO:show count and latency of authentication per scheme in this process
+class AuthenticationMetricsApiView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(authentication_metrics.snapshot())
@@ -0,0 +1,167 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+from rest_framework.authentication import (
+    BaseAuthentication,
+    BasicAuthentication,
+    SessionAuthentication,
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .claims import get_claims_version
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds the user from the token claims.
+
+    With settings.JWT_CLAIMS_AUTHENTICATION on, a token carrying the
+    current claims version of its user is trusted and no user row is
+    read, the permission checks use the is_verified claim. Otherwise the
+    user is loaded from the database as usual.
+    """
+
+    def get_user(self, validated_token):
+        if settings.JWT_CLAIMS_AUTHENTICATION and self.claims_are_current(
+            validated_token
+        ):
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+        return super().get_user(validated_token)
+
+    def claims_are_current(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        version = validated_token.get("claims_version")
+        if user_id is None or version is None:
+            return False
+        return version == get_claims_version(user_id)
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    Basic authentication that remembers a successful password check for
+    settings.BASIC_AUTH_CACHE_TIMEOUT seconds, so repeated requests skip
+    the password hashing.
+
+    The cache holds an hmac of the credentials and of the stored password
+    hash, a changed password or a deactivated user is never let in.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        key = "accounts.basic-auth." + self.hmac(f"{userid}:{password}")
+        cached = cache.get(key)
+        if cached is not None:
+            user_id, password_digest = cached
+            user = get_user_model().objects.filter(pk=user_id).first()
+            if (
+                user is not None
+                and user.is_active
+                and self.hmac(user.password) == password_digest
+            ):
+                return (user, None)
+            cache.delete(key)
+
+        user, auth = super().authenticate_credentials(
+            userid, password, request
+        )
+        cache.set(
+            key,
+            [user.pk, self.hmac(user.password)],
+            settings.BASIC_AUTH_CACHE_TIMEOUT,
+        )
+        return (user, auth)
+
+    def hmac(self, value):
+        return salted_hmac(
+            "accounts.authentication.CachedBasicAuthentication", value
+        ).hexdigest()
+
+
+class AuthenticationMetrics:
+    """
+    Per process count and latency of authentication by scheme.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.schemes = {}
+
+    def record(self, scheme, seconds):
+        with self.lock:
+            count, total, slowest = self.schemes.get(scheme, (0, 0.0, 0.0))
+            self.schemes[scheme] = (
+                count + 1,
+                total + seconds,
+                max(slowest, seconds),
+            )
+
+    def snapshot(self):
+        with self.lock:
+            schemes = dict(self.schemes)
+        return {
+            scheme: {
+                "count": count,
+                "avg_ms": total / count * 1000,
+                "max_ms": slowest * 1000,
+            }
+            for scheme, (count, total, slowest) in schemes.items()
+        }
+
+
+authentication_metrics = AuthenticationMetrics()
+
+
+class HeaderDispatchAuthentication(BaseAuthentication):
+    """
+    Run only the authentication class matching the scheme of the
+    Authorization header, instead of trying Basic, Session, Token and JWT
+    authentication in turn. Requests without the header use session
+    authentication. Time spent per scheme is kept in authentication_metrics.
+    """
+
+    scheme_classes = {
+        "basic": CachedBasicAuthentication,
+        "token": TokenAuthentication,
+        "bearer": JWTAuthentication,
+    }
+    fallback_scheme = "session"
+    fallback_class = SessionAuthentication
+
+    def authenticate(self, request):
+        header = get_authorization_header(request).split()
+        if header:
+            scheme = header[0].decode("latin-1").lower()
+            auth_class = self.scheme_classes.get(scheme)
+            if auth_class is None:
+                return None
+        else:
+            scheme = self.fallback_scheme
+            auth_class = self.fallback_class
+
+        started = time.perf_counter()
+        try:
+            return auth_class().authenticate(request)
+        finally:
+            authentication_metrics.record(
+                scheme, time.perf_counter() - started
+            )
+
+    def authenticate_header(self, request):
+        return self.scheme_classes["bearer"]().authenticate_header(request)
+
+
+class ClaimsHeaderDispatchAuthentication(HeaderDispatchAuthentication):
+    scheme_classes = {
+        **HeaderDispatchAuthentication.scheme_classes,
+        "bearer": ClaimsJWTAuthentication,
+    }
@@ -0,0 +1,44 @@
+from django.core.cache import cache
+
+import time
+
+"""
+version of the user fields copied into jwt claims (is_verified, is_active,
+password). tokens minted with an older version are not trusted and the
+user is loaded from the database instead.
+
+versions are millisecond timestamps, so a version evicted from the cache
+is re-seeded with a newer value and never matches old tokens again.
+
+"""
+
+CLAIM_FIELDS = {"is_verified", "is_active", "password"}
+
+
+def claims_version_key(user_id):
+    return f"accounts.claims-version.{user_id}"
+
+
+def get_claims_version(user_id):
+    key = claims_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_claims_version(user_id):
+    return bump_claims_versions([user_id])[user_id]
+
+
+def bump_claims_versions(user_ids):
+    keys = {claims_version_key(user_id): user_id for user_id in user_ids}
+    now = int(time.time() * 1000)
+    versions = {
+        key: max(now, version + 1)
+        for key, version in cache.get_many(list(keys)).items()
+    }
+    versions = {key: versions.get(key, now) for key in keys}
+    cache.set_many(versions, timeout=None)
+    return {keys[key]: version for key, version in versions.items()}
@@ -0,0 +1,35 @@
+from django.contrib.auth.hashers import make_password
+
+from core.processes import process_pool
+
+import os
+
+"""
+password hashes are slow by design (pbkdf2 runs hundreds of thousands of
+rounds), so bulk imports spread them over a pool of processes, one per
+core. each password still gets its own random salt.
+
+"""
+
+
+def hash_passwords(passwords, workers=None, chunksize=16, executor=None):
+    """
+    Return the make_password hash of every password, in order. None gives
+    an unusable password like make_password(None). Batches of an import
+    should share one `executor`, a pool started per call pays for the
+    process startup every time.
+    """
+    passwords = list(passwords)
+    workers = workers or os.cpu_count() or 1
+    if (
+        (executor is None and workers == 1)
+        or len(passwords) <= chunksize
+        or not any(password is not None for password in passwords)
+    ):
+        return [make_password(password) for password in passwords]
+    if executor is not None:
+        return list(
+            executor.map(make_password, passwords, chunksize=chunksize)
+        )
+    with process_pool(workers) as pool:
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
@@ -0,0 +1,131 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from accounts.hashing import hash_passwords
+from accounts.models import User
+from core.processes import process_pool
+
+import contextlib
+import csv
+import itertools
+import json
+import os
+import time
+
+
+def read_csv(file):
+    for row in csv.DictReader(file):
+        yield row
+
+
+def read_ndjson(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+READERS = {"csv": read_csv, "ndjson": read_ndjson}
+
+
+def parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes")
+    return bool(value)
+
+
+class Command(BaseCommand):
+    help = (
+        "import users with their profiles from a csv or ndjson file with "
+        "email, password and optional is_verified columns, hashing the "
+        "passwords on every core"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=READERS,
+            help="file format, guessed from the extension by default",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="number of processes hashing passwords",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or os.path.splitext(path)[1][1:]
+        if file_format not in READERS:
+            raise CommandError(f"unknown file format {file_format!r}")
+
+        started = time.perf_counter()
+        created = skipped = 0
+        seen = set()
+        email_field = User._meta.get_field("email")
+        workers = options["workers"] or 1
+        # one pool for every batch
+        if workers > 1:
+            pool = process_pool(workers)
+        else:
+            pool = contextlib.nullcontext()
+        with open(path, newline="") as file, pool as executor:
+            rows = READERS[file_format](file)
+            while True:
+                batch = list(itertools.islice(rows, options["batch_size"]))
+                if not batch:
+                    break
+                users, passwords = [], []
+                for row in batch:
+                    email = User.objects.normalize_email(
+                        (row.get("email") or "").strip()
+                    )
+                    try:
+                        email_field.run_validators(email)
+                    except ValidationError:
+                        email = None
+                    if not email or email in seen:
+                        skipped += 1
+                        continue
+                    seen.add(email)
+                    users.append(
+                        User(
+                            email=email,
+                            is_verified=parse_bool(
+                                row.get("is_verified", False)
+                            ),
+                        )
+                    )
+                    passwords.append(row.get("password") or None)
+
+                existing = set(
+                    User.objects.filter(
+                        email__in=[user.email for user in users]
+                    ).values_list("email", flat=True)
+                )
+                new_users, new_passwords = [], []
+                for user, password in zip(users, passwords):
+                    if user.email in existing:
+                        skipped += 1
+                        continue
+                    new_users.append(user)
+                    new_passwords.append(password)
+
+                hashes = hash_passwords(
+                    new_passwords, workers, executor=executor
+                )
+                for user, password in zip(new_users, hashes):
+                    user.password = password
+                User.objects.bulk_create_with_profiles(
+                    new_users, batch_size=options["batch_size"]
+                )
+                created += len(new_users)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"imported {created} users, skipped {skipped} in "
+                f"{elapsed:.2f}s ({created / elapsed:,.0f} users/s)"
+            )
+        )
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from accounts.hashing import hash_passwords
+from accounts.models import User
+
+import os
+import time
+import uuid
+
+
+class Command(BaseCommand):
+    help = "create users with their profiles in batched transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--domain", default="example.com", help="domain of the emails"
+        )
+        parser.add_argument(
+            "--password",
+            help="password of every user, unusable when not given",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="number of processes hashing passwords",
+        )
+        parser.add_argument("--verified", action="store_true")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        users = []
+        for _ in range(options["count"]):
+            user = User(
+                email=User.objects.normalize_email(
+                    f"user.{uuid.uuid4().hex[:16]}@{options['domain']}"
+                ),
+                is_verified=options["verified"],
+            )
+            users.append(user)
+        hashes = hash_passwords(
+            [options["password"]] * len(users), options["workers"]
+        )
+        for user, password in zip(users, hashes):
+            user.password = password
+        User.objects.bulk_create_with_profiles(
+            users, batch_size=options["batch_size"]
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"created {len(users)} users in {elapsed:.2f}s "
+                f"({len(users) / elapsed:,.0f} users/s)"
+            )
+        )
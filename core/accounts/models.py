@@ -1,16 +1,34 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import (
     AbstractBaseUser,
     PermissionsMixin,
     BaseUserManager,
 )
 from django.utils.translation import gettext_lazy as _
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+
+from .claims import CLAIM_FIELDS, bump_claims_version, bump_claims_versions
+
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """
+        Bump the claims version of the updated users when a field copied
+        into jwt claims changes, as save() does. Raw sql updates of those
+        fields must call bump_claims_versions() themselves.
+        """
+        if not CLAIM_FIELDS.intersection(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            user_ids = list(self.values_list("pk", flat=True))
+            rows = super().update(**kwargs)
+        bump_claims_versions(user_ids)
+        return rows
 
 
 # crate custom user and superuser
-class UserManager(BaseUserManager):
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     def create_user(self, email, password, **extra_fields):
         if not email:
             raise ValueError(_("The Email must be set"))
@@ -32,6 +50,32 @@ class UserManager(BaseUserManager):
             raise ValueError(_("Superuser must have is_superuser=True."))
         return self.create_user(email, password, **extra_fields)
 
+    def bulk_create_with_profiles(self, users, batch_size=1000):
+        """
+        Insert users and their empty profiles, one transaction per batch.
+        Passwords must already be set on the instances, save() is not
+        called for bulk inserts.
+        """
+        users = list(users)
+        for start in range(0, len(users), batch_size):
+            stop = start + batch_size
+            batch = users[start:stop]
+            with transaction.atomic(using=self.db):
+                self.bulk_create(batch)
+                if any(user.pk is None for user in batch):
+                    # sqlite does not return the ids of bulk inserted rows
+                    ids = dict(
+                        self.filter(
+                            email__in=[user.email for user in batch]
+                        ).values_list("email", "pk")
+                    )
+                    for user in batch:
+                        user.pk = ids[user.email]
+                Profile.objects.using(self.db).bulk_create(
+                    Profile(user=user) for user in batch
+                )
+        return users
+
 
 # custom User class methods for creating and updating users from models
 class User(AbstractBaseUser, PermissionsMixin):
@@ -50,6 +94,28 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if adding:
+            # every user has a profile, created in the same transaction
+            with transaction.atomic(using=kwargs.get("using")):
+                super().save(*args, **kwargs)
+                Profile.objects.using(self._state.db).create(user=self)
+            return
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        # jwt claims of existing tokens may be out of date now
+        if not adding and (
+            update_fields is None or CLAIM_FIELDS.intersection(update_fields)
+        ):
+            bump_claims_version(self.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_claims(sender, instance, **kwargs):
+    # queryset deletes too, tokens of a deleted user must not be trusted
+    bump_claims_version(instance.pk)
+
 
 class Profile(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -62,9 +128,3 @@ class Profile(models.Model):
 
     def __str__(self):
         return self.user.email
-
-
-@receiver(post_save, sender=User)
-def save(sender, instance, created, **kwargs):
-    if created:
-        Profile.objects.create(user=instance)
@@ -1,7 +1,24 @@
+import json
+
 from celery import shared_task
+from celery.signals import worker_process_init
+from django.conf import settings
 from django_celery_beat.models import PeriodicTask
+from django_redis import get_redis_connection
 from time import sleep
 
+from .api.utils import (
+    EmailDeliveryError,
+    send_emails,
+    warm_email_templates,
+)
+
+PENDING_EMAILS_KEY = "accounts.pending-emails"
+# the batch being sent, and the lock of the task sending it
+SENDING_EMAILS_KEY = "accounts.sending-emails"
+SENDING_LOCK_KEY = "accounts.sending-emails.lock"
+SENDING_LOCK_TIMEOUT = 10 * 60
+
 """
 this tasks run by celery and redis.
 this is a test for running a periodic task
@@ -17,6 +34,76 @@ def SendEmail():
 
 @shared_task
 def delete_task():
-    names = ["celery.backend_cleanup", "delete task"]
+    names = ["celery.backend_cleanup", "delete task", "send pending emails"]
     print(PeriodicTask.objects.all())
     PeriodicTask.objects.all().exclude(name__in=names).delete()
+
+
+def queue_email(user_id, email_format):
+    """
+    Add an email to the pending list, the first email of a batch schedules
+    send_pending_emails so following ones are grouped into its batch.
+    Emails left behind are picked up by the periodic run of
+    send_pending_emails, see CELERY_BEAT_SCHEDULE.
+    """
+    redis = get_redis_connection()
+    pending = redis.rpush(
+        PENDING_EMAILS_KEY, json.dumps([user_id, email_format])
+    )
+    if pending == 1 or pending % settings.EMAIL_QUEUE_BATCH_SIZE == 0:
+        send_pending_emails.apply_async(
+            countdown=settings.EMAIL_QUEUE_BATCH_DELAY
+        )
+
+
+@shared_task(autoretry_for=(EmailDeliveryError,), retry_backoff=True)
+def send_pending_emails():
+    """
+    Drain the pending list in batches, rendering and sending each batch
+    over one mail connection.
+
+    A batch is moved to the sending list and removed from it once sent, a
+    batch that failed is put back in front of the pending list and the
+    task is retried with backoff, then left to the periodic run. One task
+    drains at a time, so a batch still in the sending list when the lock
+    is taken was left by a worker that died and is sent again.
+    """
+    redis = get_redis_connection()
+    lock = redis.lock(SENDING_LOCK_KEY, timeout=SENDING_LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        # the running task may have seen the list empty already
+        send_pending_emails.apply_async(
+            countdown=settings.EMAIL_QUEUE_BATCH_DELAY
+        )
+        return 0
+    try:
+        requeue_sending_emails(redis)
+        sent = 0
+        while True:
+            with redis.pipeline() as pipe:
+                for _ in range(settings.EMAIL_QUEUE_BATCH_SIZE):
+                    pipe.lmove(
+                        PENDING_EMAILS_KEY, SENDING_EMAILS_KEY, "LEFT", "RIGHT"
+                    )
+                items = [item for item in pipe.execute() if item is not None]
+            if not items:
+                return sent
+            try:
+                sent += send_emails([json.loads(item) for item in items])
+            except Exception:
+                requeue_sending_emails(redis)
+                raise
+            redis.delete(SENDING_EMAILS_KEY)
+    finally:
+        lock.release()
+
+
+def requeue_sending_emails(redis):
+    # back in front of the pending list, in their order
+    while redis.lmove(SENDING_EMAILS_KEY, PENDING_EMAILS_KEY, "RIGHT", "LEFT"):
+        pass
+
+
+@worker_process_init.connect
+def warm_up_worker(**kwargs):
+    warm_email_templates()
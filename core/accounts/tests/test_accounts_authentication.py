@@ -0,0 +1,214 @@
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+import pytest
+import base64
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from accounts.models import User
+from accounts.authentication import authentication_metrics
+from accounts.claims import get_claims_version
+from TodoApp.models import Task
+
+
+@pytest.fixture
+def api_client():
+    client = APIClient()
+    return client
+
+
+@pytest.fixture
+def normal_user():
+    user = User.objects.create_user(
+        email="mo@gmail.com",
+        password="m@1234567",
+        is_verified=True,
+    )
+    return user
+
+
+@pytest.fixture
+def access_token(api_client, normal_user):
+    url = reverse("accounts:api-v1:jwt-create")
+    data = {
+        "email": "mo@gmail.com",
+        "password": "m@1234567",
+    }
+    response = api_client.post(url, data, format="json")
+    return response.data["access"]
+
+
+def user_queries(context):
+    table = User._meta.db_table
+    return [q for q in context.captured_queries if table in q["sql"]]
+
+
+@pytest.mark.django_db
+class TestClaimsJWTAuthentication:
+    def test_token_contains_verification_claims(self, access_token):
+        token = AccessToken(access_token)
+        assert token["is_verified"] is True
+        assert "claims_version" in token
+
+    def test_create_task_without_user_query(
+        self, settings, api_client, access_token, normal_user
+    ):
+        settings.JWT_CLAIMS_AUTHENTICATION = True
+        url = reverse("todoapp:api-v1:task-list")
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        data = {"name": "test task", "status": 1}
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.post(url, data, format="json")
+        assert response.status_code == 201
+        assert user_queries(context) == []
+        assert Task.objects.get().owner_id == normal_user.pk
+
+    def test_create_task_reads_user_when_disabled(
+        self, settings, api_client, access_token
+    ):
+        settings.JWT_CLAIMS_AUTHENTICATION = False
+        url = reverse("todoapp:api-v1:task-list")
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        data = {"name": "test task", "status": 1}
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.post(url, data, format="json")
+        assert response.status_code == 201
+        assert len(user_queries(context)) == 1
+
+    def test_unverified_user_token_is_revoked_response_403_status(
+        self, settings, api_client, normal_user, access_token
+    ):
+        settings.JWT_CLAIMS_AUTHENTICATION = True
+        normal_user.is_verified = False
+        normal_user.save()
+        url = reverse("todoapp:api-v1:task-list")
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        data = {"name": "test task", "status": 1}
+        response = api_client.post(url, data, format="json")
+        assert response.status_code == 403
+        assert Task.objects.count() == 0
+
+    def test_queryset_update_revokes_claims(
+        self, settings, api_client, normal_user, access_token
+    ):
+        settings.JWT_CLAIMS_AUTHENTICATION = True
+        User.objects.filter(pk=normal_user.pk).update(is_verified=False)
+        url = reverse("todoapp:api-v1:task-list")
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        data = {"name": "test task", "status": 1}
+        response = api_client.post(url, data, format="json")
+        assert response.status_code == 403
+
+    def test_update_of_other_fields_keeps_claims(self, normal_user):
+        version = get_claims_version(normal_user.pk)
+        User.objects.filter(pk=normal_user.pk).update(is_staff=True)
+        assert get_claims_version(normal_user.pk) == version
+
+    @pytest.mark.parametrize("delete", ["instance", "queryset"])
+    def test_deleted_user_token_is_revoked_response_401_status(
+        self, settings, api_client, normal_user, access_token, delete
+    ):
+        settings.JWT_CLAIMS_AUTHENTICATION = True
+        if delete == "instance":
+            normal_user.delete()
+        else:
+            User.objects.filter(pk=normal_user.pk).delete()
+        url = reverse("todoapp:api-v1:task-list")
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        data = {"name": "test task", "status": 1}
+        response = api_client.post(url, data, format="json")
+        assert response.status_code == 401
+        assert Task.objects.count() == 0
+
+
+@pytest.fixture
+def count_password_checks(monkeypatch):
+    calls = []
+    check_password = User.check_password
+
+    def counting_check_password(self, raw_password):
+        calls.append(raw_password)
+        return check_password(self, raw_password)
+
+    monkeypatch.setattr(User, "check_password", counting_check_password)
+    return calls
+
+
+def basic_auth(email, password):
+    credentials = base64.b64encode(f"{email}:{password}".encode()).decode()
+    return f"Basic {credentials}"
+
+
+@pytest.mark.django_db
+class TestHeaderDispatchAuthentication:
+    def test_basic_auth_password_check_is_cached(
+        self, api_client, normal_user, count_password_checks
+    ):
+        url = reverse("accounts:api-v1:profile")
+        api_client.credentials(
+            HTTP_AUTHORIZATION=basic_auth("mo@gmail.com", "m@1234567")
+        )
+        for _ in range(3):
+            response = api_client.get(url)
+            assert response.status_code == 200
+        assert len(count_password_checks) == 1
+
+    def test_basic_auth_changed_password_response_401_status(
+        self, api_client, normal_user
+    ):
+        url = reverse("accounts:api-v1:profile")
+        api_client.credentials(
+            HTTP_AUTHORIZATION=basic_auth("mo@gmail.com", "m@1234567")
+        )
+        assert api_client.get(url).status_code == 200
+        normal_user.set_password("m@12345678")
+        normal_user.save()
+        assert api_client.get(url).status_code == 401
+
+    def test_basic_auth_wrong_password_response_401_status(
+        self, api_client, normal_user
+    ):
+        url = reverse("accounts:api-v1:profile")
+        api_client.credentials(
+            HTTP_AUTHORIZATION=basic_auth("mo@gmail.com", "wrong")
+        )
+        assert api_client.get(url).status_code == 401
+
+    def test_token_auth_response_200_status(self, api_client, normal_user):
+        url = reverse("accounts:api-v1:token-login")
+        data = {"username": "mo@gmail.com", "password": "m@1234567"}
+        token = api_client.post(url, data, format="json").data["token"]
+        api_client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        response = api_client.get(reverse("accounts:api-v1:profile"))
+        assert response.status_code == 200
+
+    def test_jwt_auth_skips_other_schemes(
+        self, api_client, access_token, count_password_checks
+    ):
+        url = reverse("accounts:api-v1:profile")
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        count_password_checks.clear()
+        assert api_client.get(url).status_code == 200
+        assert count_password_checks == []
+
+    def test_unknown_scheme_response_401_status(self, api_client):
+        url = reverse("accounts:api-v1:profile")
+        api_client.credentials(HTTP_AUTHORIZATION="Digest abc")
+        assert api_client.get(url).status_code == 401
+
+    def test_metrics_are_recorded_per_scheme(self, api_client, access_token):
+        authentication_metrics.reset()
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        api_client.get(reverse("accounts:api-v1:profile"))
+        metrics = authentication_metrics.snapshot()
+        assert metrics["bearer"]["count"] == 1
+        assert metrics["bearer"]["avg_ms"] > 0
+
+    def test_metrics_view_admin_only_response_403_status(
+        self, api_client, normal_user
+    ):
+        url = reverse("accounts:api-v1:auth-metrics")
+        api_client.force_authenticate(normal_user)
+        assert api_client.get(url).status_code == 403
+        normal_user.is_staff = True
+        assert api_client.get(url).status_code == 200
@@ -1,6 +1,7 @@
 import pytest
 from accounts.models import User, Profile
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import QuerySet
 from datetime import datetime
 
 
@@ -146,3 +147,52 @@ class TestUserModel:
             assert True
         assert Profile.objects.count() == 0
         assert User.objects.count() == 0
+
+    def test_create_user_profile_in_same_transaction(self, monkeypatch):
+        def failing_save(self, *args, **kwargs):
+            raise RuntimeError("profile insert failed")
+
+        monkeypatch.setattr(Profile, "save", failing_save)
+        with pytest.raises(RuntimeError):
+            User.objects.create_user(
+                email="mo@gmail.com", password="m@1234567"
+            )
+        assert User.objects.count() == 0
+
+    def test_bulk_create_users_with_profiles(self, django_assert_num_queries):
+        users = [
+            User(email=f"user{i}@gmail.com", password="!") for i in range(5)
+        ]
+        # per batch: savepoint, users, profiles, release, and reading the
+        # ids back where the insert does not return them (sqlite)
+        per_batch = 4
+        if not connection.features.can_return_rows_from_bulk_insert:
+            per_batch += 1
+        with django_assert_num_queries(2 * per_batch):
+            User.objects.bulk_create_with_profiles(users, batch_size=3)
+        assert User.objects.count() == 5
+        assert Profile.objects.count() == 5
+        assert set(Profile.objects.values_list("user_id", flat=True)) == {
+            user.pk for user in users
+        }
+
+    def test_bulk_create_profiles_in_batch_transaction(self, monkeypatch):
+        calls = []
+        bulk_create = QuerySet.bulk_create
+
+        def failing_bulk_create(self, objs, *args, **kwargs):
+            if self.model is Profile:
+                calls.append(1)
+                if len(calls) == 2:
+                    raise RuntimeError("profile insert failed")
+            return bulk_create(self, objs, *args, **kwargs)
+
+        monkeypatch.setattr(QuerySet, "bulk_create", failing_bulk_create)
+        users = [
+            User(email=f"user{i}@gmail.com", password="!") for i in range(5)
+        ]
+        with pytest.raises(RuntimeError):
+            User.objects.bulk_create_with_profiles(users, batch_size=3)
+        # the second batch is rolled back with its profiles
+        assert User.objects.count() == 3
+        assert Profile.objects.count() == 3
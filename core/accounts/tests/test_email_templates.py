@@ -0,0 +1,51 @@
+import pytest
+from mail_templated import EmailMessage
+
+from accounts.api import utils
+from accounts.api.utils import EMAIL_FORMATS, get_email_template
+
+
+@pytest.fixture
+def email_templates():
+    utils.get_email_template.cache_clear()
+    yield
+    utils.get_email_template.cache_clear()
+
+
+class TestCompiledEmailTemplate:
+    @pytest.mark.parametrize("email_format", EMAIL_FORMATS)
+    def test_renders_like_mail_templated(self, email_templates, email_format):
+        context = {"token": "a<b>&c"}
+        expected = EmailMessage(
+            "email/%s.tpl" % email_format,
+            context,
+            "admin@admin.com",
+            to=["mo@gmail.com"],
+            render=True,
+        )
+        message = get_email_template(email_format).build_message(
+            context, "admin@admin.com", to=["mo@gmail.com"]
+        )
+        assert message.subject == expected.subject
+        assert message.body == expected.body
+        assert message.content_subtype == expected.content_subtype
+        assert message.alternatives == expected.alternatives
+        assert message.message().as_bytes().count(b"a&lt;b&gt;&amp;c") == 1
+
+    def test_template_is_loaded_once(self, email_templates, monkeypatch):
+        loaded = []
+        get_template = utils.get_template
+
+        def counting_get_template(name):
+            loaded.append(name)
+            return get_template(name)
+
+        monkeypatch.setattr(utils, "get_template", counting_get_template)
+        for i in range(10):
+            get_email_template("activation").render({"token": i})
+        assert loaded == ["email/activation.tpl"]
+
+    def test_warm_up_compiles_every_template(self, email_templates):
+        utils.warm_email_templates()
+        info = utils.get_email_template.cache_info()
+        assert info.currsize == len(EMAIL_FORMATS)
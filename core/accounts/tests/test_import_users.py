@@ -0,0 +1,96 @@
+import json
+
+import pytest
+from django.contrib.auth.hashers import (
+    check_password,
+    is_password_usable,
+    make_password,
+)
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from accounts.hashing import hash_passwords
+from accounts.management.commands import import_users
+from accounts.models import User, Profile
+from core.processes import process_pool
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text(
+        "email,password,is_verified\n"
+        "ali@gmail.com,m@1234567,true\n"
+        "sara@gmail.com,s@1234567,false\n"
+        "ali@gmail.com,other,true\n"
+        "not-an-email,m@1234567,true\n"
+        "mo@gmail.com,m@1234567,true\n"
+    )
+    return path
+
+
+@pytest.mark.django_db
+class TestImportUsersCommand:
+    def test_import_users_from_csv(self, csv_file):
+        User.objects.create_user(email="mo@gmail.com", password="m@1234567")
+        call_command("import_users", str(csv_file), batch_size=2, workers=2)
+        assert User.objects.count() == 3
+        assert Profile.objects.count() == 3
+        ali = User.objects.get(email="ali@gmail.com")
+        assert ali.is_verified
+        assert ali.check_password("m@1234567")
+        sara = User.objects.get(email="sara@gmail.com")
+        assert not sara.is_verified
+        assert sara.check_password("s@1234567")
+
+    def test_import_users_from_ndjson(self, tmp_path):
+        path = tmp_path / "users.ndjson"
+        path.write_text(
+            "\n".join(
+                json.dumps({"email": f"user{i}@gmail.com", "password": None})
+                for i in range(3)
+            )
+        )
+        call_command("import_users", str(path), workers=1)
+        assert User.objects.count() == 3
+        assert not User.objects.first().has_usable_password()
+
+    def test_import_users_reuses_one_pool(self, csv_file, monkeypatch):
+        executors = []
+
+        def record_hash_passwords(passwords, workers, executor=None):
+            executors.append(executor)
+            return [make_password(None) for _ in passwords]
+
+        monkeypatch.setattr(
+            import_users, "hash_passwords", record_hash_passwords
+        )
+        call_command("import_users", str(csv_file), batch_size=2, workers=2)
+        assert len(executors) == 3
+        assert executors[0] is not None
+        assert all(executor is executors[0] for executor in executors)
+
+    def test_import_users_unknown_format(self, tmp_path):
+        path = tmp_path / "users.txt"
+        path.write_text("")
+        with pytest.raises(CommandError):
+            call_command("import_users", str(path))
+
+
+class TestHashPasswords:
+    def test_hash_passwords_in_process_pool(self):
+        passwords = [f"password-{i}" for i in range(8)] + [None]
+        hashes = hash_passwords(passwords, workers=2, chunksize=2)
+        assert len(set(hashes)) == 9
+        assert check_password("password-0", hashes[0])
+        assert check_password("password-7", hashes[7])
+        assert not check_password("password-0", hashes[1])
+        assert not is_password_usable(hashes[-1])
+
+    def test_hash_passwords_with_executor(self):
+        passwords = [f"password-{i}" for i in range(4)]
+        with process_pool(2) as pool:
+            first = hash_passwords(passwords, chunksize=2, executor=pool)
+            second = hash_passwords(passwords, chunksize=2, executor=pool)
+        assert check_password("password-3", first[3])
+        assert check_password("password-3", second[3])
+        assert first != second
@@ -0,0 +1,293 @@
+import json
+import smtplib
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import DatabaseError
+from django.urls import reverse
+from django_celery_beat.models import IntervalSchedule, PeriodicTask
+from django_redis import get_redis_connection
+from rest_framework.test import APIClient
+
+from accounts import tasks
+from accounts.api import utils
+from accounts.api.utils import EmailDeliveryError, build_email, send_messages
+from core.celery import app
+
+User = get_user_model()
+
+LOCMEM_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+
+@pytest.fixture
+def api_client():
+    client = APIClient()
+    return client
+
+
+@pytest.fixture
+def send_calls(monkeypatch):
+    calls = []
+    send_messages = EmailBackend.send_messages
+
+    def counting_send_messages(self, messages):
+        calls.append(len(messages))
+        return send_messages(self, messages)
+
+    monkeypatch.setattr(EmailBackend, "send_messages", counting_send_messages)
+    return calls
+
+
+@pytest.fixture
+def pending_emails():
+    keys = [
+        tasks.PENDING_EMAILS_KEY,
+        tasks.SENDING_EMAILS_KEY,
+        tasks.SENDING_LOCK_KEY,
+    ]
+    redis = get_redis_connection()
+    redis.delete(*keys)
+    yield
+    redis.delete(*keys)
+
+
+@pytest.fixture
+def celery_eager():
+    app.conf.task_always_eager = True
+    yield
+    app.conf.task_always_eager = False
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, messages):
+        raise smtplib.SMTPServerDisconnected("smtp server is down")
+
+
+def make_message(i):
+    return mail.EmailMessage(
+        "subject", "body", "admin@admin.com", to=[f"user{i}@gmail.com"]
+    )
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    opened = []
+    closed = []
+    monkeypatch.setattr(EmailBackend, "open", lambda self: opened.append(self))
+    monkeypatch.setattr(
+        EmailBackend, "close", lambda self: closed.append(self)
+    )
+    return opened, closed
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(utils, "sleep", lambda seconds: None)
+
+
+class TestSendMessages:
+    def test_messages_are_sent_in_one_batch(self, send_calls, connections):
+        send_messages([make_message(i) for i in range(20)], LOCMEM_BACKEND)
+        assert len(mail.outbox) == 20
+        assert send_calls == [20]
+        opened, closed = connections
+        assert len(opened) == 1
+        assert closed == opened
+
+    def test_failed_batch_is_retried(self, monkeypatch, connections):
+        attempts = []
+        locmem_send_messages = EmailBackend.send_messages
+
+        def flaky_send_messages(self, messages):
+            attempts.append(len(messages))
+            if len(attempts) == 1:
+                raise smtplib.SMTPServerDisconnected("connection lost")
+            return locmem_send_messages(self, messages)
+
+        monkeypatch.setattr(EmailBackend, "send_messages", flaky_send_messages)
+        send_messages([make_message(1)], LOCMEM_BACKEND, retry_delay=0.01)
+        assert len(attempts) == 2
+        assert len(mail.outbox) == 1
+        # a new connection for the retry, both closed
+        opened, closed = connections
+        assert len(opened) == 2
+        assert closed == opened
+
+    def test_raises_after_retries(self, no_sleep):
+        with pytest.raises(EmailDeliveryError):
+            send_messages(
+                [make_message(1)], f"{__name__}.FailingBackend", max_retries=2
+            )
+
+
+@pytest.mark.django_db
+class TestEmailPipeline:
+    def test_pending_emails_are_sent_in_one_batch(
+        self,
+        monkeypatch,
+        pending_emails,
+        send_calls,
+        django_assert_num_queries,
+    ):
+        scheduled = []
+        monkeypatch.setattr(
+            tasks.send_pending_emails,
+            "apply_async",
+            lambda **kwargs: scheduled.append(kwargs),
+        )
+        users = [
+            User.objects.create_user(
+                email=f"user{i}@gmail.com", password="m@1234567"
+            )
+            for i in range(5)
+        ]
+        for user in users:
+            tasks.queue_email(user.pk, "activation")
+        tasks.queue_email(users[0].pk, "reset_password")
+        # only the first email schedules a send
+        assert len(scheduled) == 1
+
+        with django_assert_num_queries(1):
+            sent = tasks.send_pending_emails()
+        assert sent == 6
+        assert send_calls == [6]
+        assert len(mail.outbox) == 6
+        assert mail.outbox[-1].to == ["user0@gmail.com"]
+
+    def test_deleted_user_is_skipped(self, pending_emails):
+        user = User.objects.create_user(
+            email="mo@gmail.com", password="m@1234567"
+        )
+        tasks.queue_email(user.pk + 1000, "activation")
+        tasks.queue_email(user.pk, "activation")
+        assert tasks.send_pending_emails() == 1
+        assert mail.outbox[0].to == ["mo@gmail.com"]
+
+    def test_failed_batch_stays_pending(self, monkeypatch, pending_emails):
+        def fail(pending):
+            raise DatabaseError("database is down")
+
+        user = User.objects.create_user(
+            email="mo@gmail.com", password="m@1234567"
+        )
+        tasks.queue_email(user.pk, "activation")
+        tasks.queue_email(user.pk, "reset_password")
+        monkeypatch.setattr(tasks, "send_emails", fail)
+        with pytest.raises(DatabaseError):
+            tasks.send_pending_emails()
+        redis = get_redis_connection()
+        assert redis.llen(tasks.SENDING_EMAILS_KEY) == 0
+        monkeypatch.undo()
+        assert tasks.send_pending_emails() == 2
+        assert [message.subject for message in mail.outbox] == [
+            build_email(user, email_format).subject
+            for email_format in ("activation", "reset_password")
+        ]
+
+    def test_batch_of_dead_worker_is_sent(self, pending_emails):
+        user = User.objects.create_user(
+            email="mo@gmail.com", password="m@1234567"
+        )
+        redis = get_redis_connection()
+        # popped by a worker that died before sending
+        redis.rpush(
+            tasks.SENDING_EMAILS_KEY, json.dumps([user.pk, "activation"])
+        )
+        assert tasks.send_pending_emails() == 1
+        assert not redis.exists(tasks.SENDING_EMAILS_KEY)
+
+    def test_undelivered_emails_stay_queued(
+        self, settings, pending_emails, no_sleep
+    ):
+        settings.EMAIL_BACKEND = f"{__name__}.FailingBackend"
+        user = User.objects.create_user(
+            email="mo@gmail.com", password="m@1234567"
+        )
+        tasks.queue_email(user.pk, "activation")
+        tasks.queue_email(user.pk, "reset_password")
+        with pytest.raises(EmailDeliveryError):
+            tasks.send_pending_emails()
+        redis = get_redis_connection()
+        assert [
+            json.loads(item)
+            for item in redis.lrange(tasks.PENDING_EMAILS_KEY, 0, -1)
+        ] == [[user.pk, "activation"], [user.pk, "reset_password"]]
+        assert not redis.exists(tasks.SENDING_EMAILS_KEY)
+
+    def test_one_task_drains_at_a_time(self, monkeypatch, pending_emails):
+        scheduled = []
+        monkeypatch.setattr(
+            tasks.send_pending_emails,
+            "apply_async",
+            lambda **kwargs: scheduled.append(kwargs),
+        )
+        user = User.objects.create_user(
+            email="mo@gmail.com", password="m@1234567"
+        )
+        redis = get_redis_connection()
+        redis.rpush(
+            tasks.PENDING_EMAILS_KEY, json.dumps([user.pk, "activation"])
+        )
+        lock = redis.lock(tasks.SENDING_LOCK_KEY)
+        lock.acquire()
+        assert tasks.send_pending_emails() == 0
+        # tried again later
+        assert len(scheduled) == 1
+        lock.release()
+        assert tasks.send_pending_emails() == 1
+
+    def test_unscheduled_emails_are_swept(
+        self, monkeypatch, pending_emails, settings
+    ):
+        monkeypatch.setattr(
+            tasks.send_pending_emails, "apply_async", lambda **kwargs: None
+        )
+        user = User.objects.create_user(
+            email="mo@gmail.com", password="m@1234567"
+        )
+        # the send scheduled by the first email was lost
+        tasks.queue_email(user.pk, "activation")
+        tasks.queue_email(user.pk, "reset_password")
+        entry = settings.CELERY_BEAT_SCHEDULE["send pending emails"]
+        assert app.tasks[entry["task"]]() == 2
+        assert len(mail.outbox) == 2
+
+    def test_sweep_kept_by_delete_task(self):
+        schedule = IntervalSchedule.objects.create(
+            every=60, period=IntervalSchedule.SECONDS
+        )
+        for name in ("send pending emails", "other"):
+            PeriodicTask.objects.create(
+                name=name,
+                task="accounts.tasks.send_pending_emails",
+                interval=schedule,
+            )
+        tasks.delete_task()
+        assert list(PeriodicTask.objects.values_list("name", flat=True)) == [
+            "send pending emails"
+        ]
+
+    def test_registration_sends_activation_email(
+        self,
+        api_client,
+        pending_emails,
+        celery_eager,
+        django_capture_on_commit_callbacks,
+    ):
+        url = reverse("accounts:api-v1:registration")
+        data = {
+            "email": "mo@gmail.com",
+            "password": "m@1234567",
+            "password1": "m@1234567",
+        }
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post(url, data, format="json")
+            # nothing is rendered or sent inside the request
+            assert len(mail.outbox) == 0
+        assert response.status_code == 201
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ["mo@gmail.com"]
+        assert "activation/confirm/" in mail.outbox[0].body
@@ -0,0 +1,24 @@
+import pytest
+from django.core.management import call_command
+from accounts.models import User, Profile
+
+
+@pytest.mark.django_db
+class TestProvisionUsersCommand:
+    def test_provision_users_default_count(self):
+        call_command("provision_users")
+        assert User.objects.count() == 5
+        assert Profile.objects.count() == 5
+        assert not User.objects.first().has_usable_password()
+
+    def test_provision_users_in_batches(self):
+        call_command(
+            "provision_users",
+            count=25,
+            batch_size=10,
+            password="m@1234567",
+            verified=True,
+        )
+        assert User.objects.filter(is_verified=True).count() == 25
+        assert Profile.objects.count() == 25
+        assert User.objects.first().check_password("m@1234567")
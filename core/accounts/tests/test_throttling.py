@@ -0,0 +1,208 @@
+import threading
+
+import pytest
+from django.urls import reverse
+from redis.exceptions import ConnectionError
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core import throttling
+from core.throttling import SlidingWindowThrottle, hit, parse_rate
+
+
+@pytest.fixture
+def api_client():
+    client = APIClient()
+    return client
+
+
+@pytest.fixture
+def common_user():
+    user = User.objects.create_user(
+        email="throttle@gmail.com", password="m@1234567", is_verified=True
+    )
+    return user
+
+
+@pytest.fixture
+def rates(settings):
+    def rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": rates,
+        }
+
+    return rates
+
+
+class TestSlidingWindow:
+    def test_parse_rate(self):
+        assert parse_rate("10/min") == (10, 60)
+        assert parse_rate("5/hour") == (5, 3600)
+        assert parse_rate("") is None
+
+    def test_limit_within_window(self):
+        rules = [("test.window", 3, 60)]
+        assert [hit(rules, now=6000.0 + i) for i in range(3)] == [0, 0, 0]
+        assert hit(rules, now=6003.0) > 0
+
+    def test_previous_window_weighted(self):
+        rules = [("test.weighted", 4, 60)]
+        # 4 requests at the end of a window
+        for i in range(4):
+            assert hit(rules, now=6059.0) == 0
+        # a quarter into the next one, 3/4 of them still count
+        assert hit(rules, now=6075.0) == 0
+        wait = hit(rules, now=6075.0)
+        assert wait > 0
+        # allowed again once enough of the previous window slid out
+        assert hit(rules, now=6075.0 + wait) == 0
+
+    def test_denied_requests_not_counted(self):
+        rules = [("test.denied", 1, 60), ("test.denied.other", 5, 60)]
+        assert hit(rules, now=6000.0) == 0
+        for _ in range(5):
+            assert hit(rules, now=6001.0) > 0
+        assert hit([("test.denied.other", 2, 60)], now=6002.0) == 0
+
+    def test_request_cost(self):
+        rules = [("test.cost", 10, 60)]
+        assert hit(rules, now=6000.0, cost=8) == 0
+        assert hit(rules, now=6001.0, cost=3) > 0
+        assert hit(rules, now=6002.0, cost=2) == 0
+        assert hit(rules, now=6003.0) > 0
+
+    def test_cost_over_limit_takes_whole_limit(self):
+        rules = [("test.over", 10, 60)]
+        assert hit(rules, now=6000.0, cost=50) == 0
+        assert hit(rules, now=6001.0) > 0
+        # allowed again once the window slid past it
+        assert hit(rules, now=6120.0, cost=50) == 0
+
+    def test_concurrent_requests_never_exceed_limit(self):
+        rules = [("test.concurrent", 50, 60)]
+        results = []
+
+        def client():
+            for _ in range(20):
+                results.append(hit(rules, now=6000.0))
+
+        threads = [threading.Thread(target=client) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results.count(0) == 50
+
+
+@pytest.mark.django_db
+class TestSlidingWindowThrottle:
+    def test_login_throttled_per_account(self, api_client, rates):
+        rates(login="2/min")
+        url = reverse("accounts:api-v1:jwt-create")
+        data = {"email": "nobody@gmail.com", "password": "wrong"}
+        for _ in range(2):
+            assert api_client.post(url, data).status_code == 401
+        response = api_client.post(url, data)
+        assert response.status_code == 429
+        assert int(response["Retry-After"]) > 0
+        # the account is counted whatever the client address
+        data["email"] = " Nobody@gmail.com"
+        other = api_client.post(url, data, REMOTE_ADDR="10.0.0.2")
+        assert other.status_code == 429
+        # another account has a counter of its own
+        data["email"] = "somebody@gmail.com"
+        assert api_client.post(url, data).status_code == 401
+
+    def test_ip_rate_caps_accounts_cycled(self, api_client, rates):
+        rates(login="2/min", **{"login.ip": "3/min"})
+        url = reverse("accounts:api-v1:jwt-create")
+        statuses = [
+            api_client.post(
+                url, {"email": f"user{i}@gmail.com", "password": "wrong"}
+            ).status_code
+            for i in range(4)
+        ]
+        assert statuses == [401, 401, 401, 429]
+        # another client address has a counter of its own
+        data = {"email": "user9@gmail.com", "password": "wrong"}
+        other = api_client.post(url, data, REMOTE_ADDR="10.0.0.2")
+        assert other.status_code == 401
+
+    def test_token_login_throttled_per_username(self, api_client, rates):
+        rates(login="1/min")
+        url = reverse("accounts:api-v1:token-login")
+        data = {"username": "nobody@gmail.com", "password": "wrong"}
+        assert api_client.post(url, data).status_code == 400
+        assert api_client.post(url, data).status_code == 429
+
+    def test_anonymous_client_counted_once_per_rate(self, api_client, rates):
+        rates(login="3/min", **{"login.ip": "3/min"})
+        url = reverse("accounts:api-v1:jwt-create")
+        data = {"email": "nobody@gmail.com", "password": "wrong"}
+        statuses = [api_client.post(url, data).status_code for _ in range(4)]
+        assert statuses == [401, 401, 401, 429]
+
+    def test_scope_ip_rate_counts_every_user(
+        self, api_client, common_user, rates
+    ):
+        rates(**{"task-write": "100/min", "task-write.ip": "2/min"})
+        url = reverse("todoapp:api-v1:task-list")
+        other = User.objects.create_user(
+            email="other@gmail.com", password="m@1234567", is_verified=True
+        )
+        data = {"name": "task", "status": 1}
+        for user in (common_user, other):
+            api_client.force_authenticate(user=user)
+            assert api_client.post(url, data).status_code == 201
+        assert api_client.post(url, data).status_code == 429
+
+    def test_task_reads_not_throttled(self, api_client, common_user, rates):
+        rates(**{"task-write": "1/min"})
+        api_client.force_authenticate(user=common_user)
+        url = reverse("todoapp:api-v1:task-list")
+        for _ in range(3):
+            assert api_client.get(url).status_code == 200
+        response = api_client.post(url, {"name": "a", "status": 1})
+        assert response.status_code == 201
+        response = api_client.post(url, {"name": "b", "status": 1})
+        assert response.status_code == 429
+
+    def test_bulk_requests_charged_per_task(
+        self, api_client, common_user, rates
+    ):
+        rates(**{"task-write": "100/min", "task-bulk": "5/min"})
+        api_client.force_authenticate(user=common_user)
+        url = reverse("todoapp:api-v1:task-bulk")
+        data = [{"name": f"task {i}", "status": 1} for i in range(3)]
+        assert api_client.post(url, data, format="json").status_code == 201
+        response = api_client.post(url, data, format="json")
+        assert response.status_code == 429
+        ids = {"ids": [1, 2, 3]}
+        response = api_client.delete(url, ids, format="json")
+        assert response.status_code == 429
+        # single writes have a rate of their own
+        url = reverse("todoapp:api-v1:task-list")
+        response = api_client.post(url, {"name": "a", "status": 1})
+        assert response.status_code == 201
+
+    def test_views_without_scope_not_throttled(
+        self, api_client, common_user, rates
+    ):
+        rates(register="1/min")
+        api_client.force_authenticate(user=common_user)
+        url = reverse("accounts:api-v1:profile")
+        for _ in range(3):
+            assert api_client.get(url).status_code == 200
+
+    def test_allowed_when_redis_is_down(self, rf, monkeypatch, rates):
+        rates(login="1/min")
+
+        def fail(*args, **kwargs):
+            raise ConnectionError("redis is down")
+
+        monkeypatch.setattr(throttling, "hit", fail)
+        request = rf.post("/")
+        request.user = None
+        view = type("View", (), {"throttle_scope": "login"})()
+        assert SlidingWindowThrottle().allow_request(request, view)
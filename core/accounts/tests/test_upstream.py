@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from accounts import views
+from accounts.upstream import UpstreamError, UpstreamProxy
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits += 1
+            server.clients.add(self.client_address)
+            hits = server.hits
+        time.sleep(server.delay)
+        if server.fail:
+            body, status = b"upstream down", 503
+        else:
+            body, status = json.dumps({"hits": hits}).encode(), 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.lock = threading.Lock()
+    server.hits = 0
+    server.clients = set()
+    server.delay = 0
+    server.fail = False
+    server.url = f"http://127.0.0.1:{server.server_port}/weather"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def proxy(stub_server):
+    proxy = UpstreamProxy("test-weather", ttl=60, stale_ttl=60, timeout=2)
+    cache.delete(proxy.make_key(stub_server.url))
+    yield proxy
+    cache.delete(proxy.make_key(stub_server.url))
+
+
+def make_stale(proxy, url):
+    key = proxy.make_key(url)
+    entry = cache.get(key)
+    entry["fetched_at"] -= proxy.ttl + 1
+    cache.set(key, entry)
+
+
+class TestUpstreamProxy:
+    def test_response_is_cached(self, proxy, stub_server):
+        assert proxy.get(stub_server.url) == {"hits": 1}
+        assert proxy.get(stub_server.url) == {"hits": 1}
+        assert stub_server.hits == 1
+
+    def test_connection_is_kept_alive(self, proxy, stub_server):
+        for _ in range(3):
+            proxy.fetch(stub_server.url)
+        assert stub_server.hits == 3
+        assert len(stub_server.clients) == 1
+
+    def test_concurrent_misses_fetch_once(self, proxy, stub_server):
+        stub_server.delay = 0.2
+        results = []
+
+        def get():
+            results.append(proxy.get(stub_server.url))
+
+        threads = [threading.Thread(target=get) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert stub_server.hits == 1
+        assert results == [{"hits": 1}] * 10
+
+    def test_stale_response_served_while_refreshing(self, proxy, stub_server):
+        proxy.get(stub_server.url)
+        make_stale(proxy, stub_server.url)
+        stub_server.delay = 0.2
+        started = time.monotonic()
+        assert proxy.get(stub_server.url) == {"hits": 1}
+        assert time.monotonic() - started < 0.2
+        # the refresh is already running, no second one is started
+        assert proxy.refresh(stub_server.url) is None
+        time.sleep(0.5)
+        assert proxy.get(stub_server.url) == {"hits": 2}
+        assert stub_server.hits == 2
+
+    def test_failed_refresh_keeps_stale_response(self, proxy, stub_server):
+        proxy.get(stub_server.url)
+        make_stale(proxy, stub_server.url)
+        stub_server.fail = True
+        proxy.refresh(stub_server.url).result()
+        assert proxy.get(stub_server.url) == {"hits": 1}
+
+    def test_failed_miss_raises_upstream_error(self, proxy, stub_server):
+        stub_server.fail = True
+        with pytest.raises(UpstreamError):
+            proxy.get(stub_server.url)
+
+
+class TestWeatherView:
+    def test_weather_response_200_status(
+        self, client, settings, proxy, stub_server, monkeypatch
+    ):
+        settings.WEATHER_API_URL = stub_server.url
+        monkeypatch.setattr(views, "weather_proxy", proxy)
+        response = client.get(reverse("accounts:weather-test"))
+        assert response.status_code == 200
+        assert response.json() == {"hits": 1}
+
+    def test_weather_upstream_down_response_502_status(
+        self, client, settings, proxy, stub_server, monkeypatch
+    ):
+        settings.WEATHER_API_URL = stub_server.url
+        stub_server.fail = True
+        monkeypatch.setattr(views, "weather_proxy", proxy)
+        response = client.get(reverse("accounts:weather-test"))
+        assert response.status_code == 502
@@ -0,0 +1,141 @@
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class UpstreamProxy:
+    """
+    Cached GET proxy for a slow external JSON API.
+
+    Requests go through one pooled keep-alive session. A cached response
+    younger than `ttl` is served as is. Up to `stale_ttl` seconds later it
+    is still served, while a single background refresh replaces it. On a
+    miss only one caller fetches: threads of this process wait on its
+    result, and other processes wait on a cache lock, then read what it
+    cached.
+    """
+
+    def __init__(
+        self,
+        key_prefix,
+        ttl=60 * 20,
+        stale_ttl=60 * 60,
+        timeout=5.0,
+        pool_size=10,
+        refresh_workers=2,
+    ):
+        self.key_prefix = key_prefix
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(
+            refresh_workers, thread_name_prefix=f"{key_prefix}-refresh"
+        )
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def make_key(self, url):
+        digest = hashlib.md5(url.encode()).hexdigest()
+        return f"upstream.{self.key_prefix}.{digest}"
+
+    def get(self, url):
+        key = self.make_key(url)
+        entry = cache.get(key)
+        if entry is None:
+            return self.fetch_once(url)
+        if time.time() - entry["fetched_at"] >= self.ttl:
+            self.refresh(url)
+        return entry["data"]
+
+    def fetch(self, url):
+        """
+        Request the url and cache its json for ttl + stale_ttl seconds.
+        """
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as exc:
+            raise UpstreamError(f"upstream request failed: {exc}") from exc
+        cache.set(
+            self.make_key(url),
+            {"data": data, "fetched_at": time.time()},
+            self.ttl + self.stale_ttl,
+        )
+        return data
+
+    def fetch_once(self, url):
+        key = self.make_key(url)
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Future()
+        if not leader:
+            return flight.result()
+        try:
+            data = self.fetch_or_wait(url)
+        except Exception as exc:
+            flight.set_exception(exc)
+            raise
+        else:
+            flight.set_result(data)
+            return data
+        finally:
+            with self.lock:
+                del self.flights[key]
+
+    def fetch_or_wait(self, url):
+        key = self.make_key(url)
+        lock_key = f"{key}.lock"
+        if cache.add(lock_key, 1, self.timeout * 2):
+            try:
+                return self.fetch(url)
+            finally:
+                cache.delete(lock_key)
+        # another process is fetching, give it the time of one request
+        deadline = time.monotonic() + self.timeout * 2
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry["data"]
+        return self.fetch(url)
+
+    def refresh(self, url):
+        """
+        Refresh a stale entry in the background, unless another worker
+        already does. Returns the future of the refresh or None.
+        """
+        lock_key = f"{self.make_key(url)}.lock"
+        if not cache.add(lock_key, 1, self.timeout * 2):
+            return None
+        return self.executor.submit(self._refresh, url, lock_key)
+
+    def _refresh(self, url, lock_key):
+        try:
+            self.fetch(url)
+        except UpstreamError:
+            logger.warning(
+                "refreshing %s failed, serving stale", self.key_prefix
+            )
+        finally:
+            cache.delete(lock_key)
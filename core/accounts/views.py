@@ -1,8 +1,14 @@
+from django.conf import settings
 from django.http import HttpResponse, JsonResponse
-from django.views.decorators.cache import cache_page
 
 from .tasks import SendEmail
-import requests
+from .upstream import UpstreamError, UpstreamProxy
+
+weather_proxy = UpstreamProxy(
+    "weather",
+    ttl=settings.WEATHER_CACHE_TTL,
+    stale_ttl=settings.WEATHER_CACHE_STALE_TTL,
+)
 
 
 def send_email(request):
@@ -10,9 +16,11 @@ def send_email(request):
     return HttpResponse("<h1>Email sent</h1>")
 
 
-@cache_page(60 * 20)
 def WeatherTestView(request):
-    response = requests.get(
-        "https://api.openweathermap.org/data/2.5/weather?lat=37.268219&lon=49.589123&appid=9be11538ceebf4c5d0ee0c5d97579881"
-    )
-    return JsonResponse(response.json())
+    try:
+        data = weather_proxy.get(settings.WEATHER_API_URL)
+    except UpstreamError:
+        return JsonResponse(
+            {"detail": "weather service is unavailable"}, status=502
+        )
+    return JsonResponse(data)
@@ -0,0 +1,14 @@
+"""
+benchmarks for the project, run them from the core directory:
+
+    python -m benchmarks.<module name>
+
+they use the dev settings unless DJANGO_SETTINGS_MODULE is set.
+"""
+
+import os
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.dev")
+django.setup()
@@ -0,0 +1,122 @@
+"""
+bytes stored and encode/decode time of cached task list responses for
+each cache serializer and compressor: the cache_response entry of a page
+of tasks and a rendered HttpResponse as cache_page stores it.
+"""
+
+import argparse
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.http import HttpResponse
+from django.utils import timezone
+from django_redis.compressors.identity import IdentityCompressor
+from django_redis.serializers.pickle import PickleSerializer
+from faker import Faker
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from core.cache_codec import (
+    ALGORITHMS,
+    MsgpackSerializer,
+    OrjsonSerializer,
+    ThresholdCompressor,
+)
+from TodoApp.api.v1.serializers import TaskReadSerializer
+from TodoApp.models import Task
+
+SERIALIZERS = {
+    "pickle": PickleSerializer,
+    "orjson": OrjsonSerializer,
+    "msgpack": MsgpackSerializer,
+}
+
+
+def task_list_data(count):
+    # the paginated data of the task list, as the view returns it
+    faker = Faker()
+    now = timezone.now()
+    tasks = [
+        Task(
+            id=100000 - i,
+            name=faker.job()[:35],
+            status=Task.DONE if i % 3 else Task.ON_GOING,
+            created_date=now - timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+    serializer = TaskReadSerializer(tasks, many=True)
+    return ReturnDict(
+        [
+            (
+                "next",
+                "http://testserver/api/v1/task/?cursor=cD0yMDI2LTEwLTE4",
+            ),
+            ("previous", None),
+            ("results", serializer.data),
+        ],
+        serializer=serializer,
+    )
+
+
+def payloads(count):
+    data = task_list_data(count)
+    entry = {"data": data, "delta": 0.012, "expires": time.time() + 300}
+    response = HttpResponse(
+        JSONRenderer().render(data), content_type="application/json"
+    )
+    return OrderedDict([("cache_response", entry), ("cache_page", response)])
+
+
+def codecs(min_length):
+    compressors = {"none": IdentityCompressor({})}
+    for algorithm, (_, module, _, _) in ALGORITHMS.items():
+        if module is not None:
+            compressors[algorithm] = ThresholdCompressor(
+                {
+                    "COMPRESS_ALGORITHM": algorithm,
+                    "COMPRESS_MIN_LENGTH": min_length,
+                }
+            )
+    for name, serializer_class in SERIALIZERS.items():
+        serializer = serializer_class({})
+        for algorithm, compressor in compressors.items():
+            yield f"{name}+{algorithm}", serializer, compressor
+
+
+def measure(serializer, compressor, value, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        encoded = compressor.compress(serializer.dumps(value))
+    encode = (time.perf_counter() - started) / repeat
+    started = time.perf_counter()
+    for _ in range(repeat):
+        serializer.loads(compressor.decompress(encoded))
+    decode = (time.perf_counter() - started) / repeat
+    return len(encoded), encode, decode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100])
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--min-length", type=int, default=1024)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        for name, value in payloads(size).items():
+            print(f"\n{name}, {size} tasks")
+            print(f"{'codec':>18} {'bytes':>9} {'encode':>10} {'decode':>10}")
+            for codec, serializer, compressor in codecs(args.min_length):
+                length, encode, decode = measure(
+                    serializer, compressor, value, args.repeat
+                )
+                print(
+                    f"{codec:>18} {length:>9,} {encode * 1e6:>8.1f}us "
+                    f"{decode * 1e6:>8.1f}us"
+                )
+
+
+if __name__ == "__main__":
+    main()
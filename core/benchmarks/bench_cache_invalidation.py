@@ -0,0 +1,66 @@
+"""
+compare delete_pattern (SCAN) invalidation with the generation counter
+as the number of keys in the cache grows. needs a running redis.
+"""
+
+import argparse
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+from TodoApp.api.utils import delete_cache, delete_cache_pattern
+
+KEY_PREFIX = "bench-task-view"
+
+
+def fill_cache(count):
+    # keys shaped like the ones cache_page writes for the task list
+    client = get_redis_connection("default")
+    pipe = client.pipeline(transaction=False)
+    suffix = f"{settings.LANGUAGE_CODE}.{settings.TIME_ZONE}"
+    for i in range(count):
+        key = cache.make_key(
+            f"views.decorators.cache.cache_page.{KEY_PREFIX}.GET.{i}.{suffix}"
+        )
+        pipe.set(key, b"x", ex=300)
+        if i % 10000 == 0:
+            pipe.execute()
+    pipe.execute()
+
+
+def measure(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(KEY_PREFIX)
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000]
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'keys':>10} {'delete_pattern':>16} {'generation':>12}")
+    for size in args.sizes:
+        fill_cache(size)
+        generation = measure(delete_cache, args.repeat)
+        # the keys are deleted by the first scan, refill before each one
+        pattern = 0
+        for _ in range(args.repeat):
+            fill_cache(size)
+            pattern += measure(delete_cache_pattern, 1)
+        pattern /= args.repeat
+        print(
+            f"{size:>10} {pattern * 1000:>14.3f}ms "
+            f"{generation * 1000:>10.3f}ms"
+        )
+    cache.delete(f"{KEY_PREFIX}.generation")
+
+
+if __name__ == "__main__":
+    main()
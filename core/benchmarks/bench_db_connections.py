@@ -0,0 +1,115 @@
+"""
+time per request spent on the database connection: a new connection for
+each request, persistent connections with and without health checks, and
+the in-process pool. each thread stands for a worker thread serving
+requests with one query. run it against postgres to see the TCP and auth
+handshake:
+
+    DJANGO_SETTINGS_MODULE=core.settings.stage \\
+        python -m benchmarks.bench_db_connections
+"""
+
+import argparse
+import threading
+import time
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.utils import load_backend
+
+ENGINES = {
+    "postgresql": "core.db.postgresql",
+    "sqlite": "core.db.sqlite3",
+}
+
+MODES = {
+    "per request": {"CONN_MAX_AGE": 0},
+    "persistent": {"CONN_MAX_AGE": 60},
+    "persistent+checks": {"CONN_MAX_AGE": 60, "CONN_HEALTH_CHECKS": True},
+    "pool": {"CONN_MAX_AGE": 0, "pool": True},
+    "pool+checks": {
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": True,
+        "pool": True,
+    },
+}
+
+
+def settings_for(mode, pool_size):
+    default = connections["default"]
+    settings = dict(MODES[mode])
+    options = dict(default.settings_dict["OPTIONS"])
+    options.pop("pool", None)
+    if settings.pop("pool", False):
+        options["pool"] = {"max_size": pool_size}
+    return {
+        **default.settings_dict,
+        "ENGINE": ENGINES[default.vendor],
+        "CONN_HEALTH_CHECKS": False,
+        "OPTIONS": options,
+        **settings,
+    }
+
+
+def serve(backend, settings_dict, alias, requests, timings):
+    # django keeps one wrapper per thread
+    wrapper = backend.DatabaseWrapper(settings_dict, alias=alias)
+    started = time.perf_counter()
+    for _ in range(requests):
+        # request_started and request_finished call this
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        wrapper.close_if_unusable_or_obsolete()
+    timings.append(time.perf_counter() - started)
+    wrapper.close()
+
+
+def run(mode, threads, requests, pool_size):
+    settings_dict = settings_for(mode, pool_size)
+    backend = load_backend(settings_dict["ENGINE"])
+    # also sent for connections taken from the pool, count distinct ones
+    opened = set()
+
+    def count(sender, connection, **kwargs):
+        if connection.alias == mode:
+            opened.add(connection.connection)
+
+    connection_created.connect(count)
+    timings = []
+    workers = [
+        threading.Thread(
+            target=serve,
+            args=(backend, settings_dict, mode, requests, timings),
+        )
+        for _ in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    connection_created.disconnect(count)
+    per_request = sum(timings) / (threads * requests)
+    return per_request, len(opened)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    vendor = connections["default"].vendor
+    print(f"{vendor}, {args.threads} threads x {args.requests} requests")
+    print(f"{'mode':>18} {'per request':>12} {'connections':>12}")
+    for mode in MODES:
+        per_request, opened = run(
+            mode, args.threads, args.requests, args.pool_size
+        )
+        print(f"{mode:>18} {per_request * 1e6:>10.0f}us {opened:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+emails rendered per second with mail_templated, which goes through the
+template loaders and renders the whole base template for every message,
+against the compiled templates used by the email tasks.
+"""
+
+import argparse
+import time
+
+from mail_templated import EmailMessage
+
+from accounts.api.utils import EMAIL_FORMATS, get_email_template
+
+
+def render_mail_templated(email_format, i):
+    message = EmailMessage(
+        "email/%s.tpl" % email_format,
+        {"token": f"token-{i}"},
+        "admin@admin.com",
+        to=[f"user{i}@gmail.com"],
+    )
+    message.render()
+    return message.message()
+
+
+def render_compiled(email_format, i):
+    message = get_email_template(email_format).build_message(
+        {"token": f"token-{i}"},
+        "admin@admin.com",
+        to=[f"user{i}@gmail.com"],
+    )
+    return message.message()
+
+
+def measure(func, email_format, count):
+    started = time.perf_counter()
+    for i in range(count):
+        func(email_format, i)
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'template':>16} {'mail_templated':>16} {'compiled':>12}")
+    for email_format in EMAIL_FORMATS:
+        baseline = measure(render_mail_templated, email_format, args.count)
+        compiled = measure(render_compiled, email_format, args.count)
+        print(
+            f"{email_format:>16} {baseline:>11,.0f} em/s "
+            f"{compiled:>7,.0f} em/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
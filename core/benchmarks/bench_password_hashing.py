@@ -0,0 +1,47 @@
+"""
+users per second hashed with the configured password hasher, one process
+against the process pool used by import_users and provision_users.
+"""
+
+import argparse
+import os
+import time
+
+from django.contrib.auth.hashers import get_hasher, make_password
+
+from accounts.hashing import hash_passwords
+
+
+def measure(func, passwords):
+    started = time.perf_counter()
+    func(passwords)
+    return len(passwords) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[os.cpu_count()]
+    )
+    args = parser.parse_args()
+
+    passwords = [f"password-{i}" for i in range(args.count)]
+    print(f"hasher: {get_hasher().algorithm}, {args.count} passwords")
+    serial = measure(
+        lambda items: [make_password(password) for password in items],
+        passwords,
+    )
+    print(f"{'serial':>12} {serial:>10,.1f} users/s")
+    for workers in args.workers:
+        pooled = measure(
+            lambda items: hash_passwords(items, workers), passwords
+        )
+        print(
+            f"{workers:>4} workers {pooled:>10,.1f} users/s "
+            f"({pooled / serial:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
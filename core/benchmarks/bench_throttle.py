@@ -0,0 +1,130 @@
+"""
+throttle decision latency of the redis sliding window throttle, checking
+a per client and a per ip rate in one script call, against drf's
+ScopedRateThrottle keeping a request history in the cache. then clients
+in threads hammer a limited scope to count the requests let through.
+needs a running redis.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from rest_framework.throttling import ScopedRateThrottle
+
+from core.throttling import SlidingWindowThrottle
+
+SCOPE = "bench-throttle"
+
+
+class View:
+    throttle_scope = SCOPE
+
+
+def make_request(client):
+    request = RequestFactory().post("/", REMOTE_ADDR=f"10.0.{client}.1")
+    request.user = AnonymousUser()
+    return request
+
+
+def throttle_classes(rate):
+    rates = {SCOPE: rate, f"{SCOPE}.ip": rate}
+
+    class HistoryThrottle(ScopedRateThrottle):
+        THROTTLE_RATES = rates
+
+    return rates, {
+        "sliding window": SlidingWindowThrottle,
+        "drf history": HistoryThrottle,
+    }
+
+
+def latencies(throttle_class, requests, clients):
+    view = View()
+    requests_of = [make_request(client) for client in range(clients)]
+    timings = []
+    for i in range(requests):
+        request = requests_of[i % clients]
+        started = time.perf_counter()
+        throttle_class().allow_request(request, view)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)
+
+
+def admitted(throttle_class, threads, requests):
+    # every thread is the same client
+    view = View()
+    allowed = []
+
+    def client():
+        request = make_request(0)
+        for _ in range(requests):
+            if throttle_class().allow_request(request, view):
+                allowed.append(1)
+
+    workers = [threading.Thread(target=client) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return len(allowed)
+
+
+def reset():
+    cache.delete_pattern("throttle.*")
+    # keys of the drf throttles
+    cache.delete_pattern("throttle_*")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    rates, classes = throttle_classes("1000000/min")
+    print(f"{'throttle':>15} {'p50':>9} {'p99':>9}")
+    with override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": rates,
+        }
+    ):
+        for name, throttle_class in classes.items():
+            reset()
+            timings = latencies(throttle_class, args.requests, args.clients)
+            p99 = timings[int(len(timings) * 0.99)]
+            print(
+                f"{name:>15} {statistics.median(timings) * 1e6:>7.0f}us "
+                f"{p99 * 1e6:>7.0f}us"
+            )
+
+    rates, classes = throttle_classes(f"{args.limit}/min")
+    print(
+        f"\n{args.threads} threads x {args.limit} requests, "
+        f"limit {args.limit}/min"
+    )
+    print(f"{'throttle':>15} {'allowed':>9}")
+    with override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": rates,
+        }
+    ):
+        for name, throttle_class in classes.items():
+            reset()
+            allowed = admitted(throttle_class, args.threads, args.limit)
+            print(f"{name:>15} {allowed:>9}")
+    reset()
+
+
+if __name__ == "__main__":
+    main()
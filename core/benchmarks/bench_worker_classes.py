@@ -0,0 +1,127 @@
+"""
+requests/s and latency of the task list under gunicorn.conf.py with each
+worker class. gunicorn is started once per class with the settings of
+the containers, then loaded by client processes that keep their
+connection open like nginx does. fill the database with insert_data
+first and pass an access token of a user owning tasks, anonymous clients
+list none. sync and gthread workers serve the wsgi view, uvicorn workers
+the async one.
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import requests
+from django.urls import reverse
+
+WORKER_CLASSES = ("sync", "gthread", "uvicorn")
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), 1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"gunicorn did not listen on {port}")
+
+
+def start_server(worker_type, port, workers):
+    env = dict(
+        os.environ,
+        GUNICORN_WORKER_CLASS=worker_type,
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+    )
+    if workers:
+        env["GUNICORN_WORKERS"] = str(workers)
+    server = subprocess.Popen(
+        ["gunicorn", "--config", "gunicorn.conf.py"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    wait_for_port(port)
+    return server
+
+
+def run_client(url, duration, token):
+    session = requests.Session()
+    if token:
+        session.headers["Authorization"] = f"Bearer {token}"
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            response = session.get(url, timeout=10)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        latencies.append(time.perf_counter() - started)
+        errors += not ok
+    return latencies, errors
+
+
+def load(url, clients, duration, token):
+    with ProcessPoolExecutor(clients) as pool:
+        results = list(
+            pool.map(
+                run_client,
+                [url] * clients,
+                [duration] * clients,
+                [token] * clients,
+            )
+        )
+    latencies = sorted(t for result, _ in results for t in result)
+    errors = sum(errors for _, errors in results)
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--worker-classes", nargs="+", default=list(WORKER_CLASSES)
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token", help="JWT access token of the client")
+    args = parser.parse_args()
+
+    print(
+        f"{'worker class':>14} {'req/s':>9} {'p50':>9} {'p99':>9} "
+        f"{'errors':>7}"
+    )
+    for worker_type in args.worker_classes:
+        name = "async-task-list" if worker_type == "uvicorn" else "task-list"
+        path = reverse(f"todoapp:api-v1:{name}")
+        url = f"http://127.0.0.1:{args.port}{path}"
+        server = start_server(worker_type, args.port, args.workers)
+        try:
+            # warm up the workers and the cached response
+            load(url, args.clients, 1, args.token)
+            latencies, errors = load(
+                url, args.clients, args.duration, args.token
+            )
+        finally:
+            server.terminate()
+            server.wait()
+        p99 = latencies[int(len(latencies) * 0.99)]
+        print(
+            f"{worker_type:>14} {len(latencies) / args.duration:>9,.0f} "
+            f"{statistics.median(latencies) * 1000:>7.1f}ms "
+            f"{p99 * 1000:>7.1f}ms {errors:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def reset_throttles():
+    # throttle counters live in redis across tests and runs
+    cache.delete_pattern("throttle.*")
+
+
+@pytest.fixture(autouse=True)
+def reset_task_lists():
+    # cached task lists are keyed on user ids, which tests reuse
+    cache.delete_pattern("task-view.*")
@@ -0,0 +1,327 @@
+"""
+two tier cache client for django_redis: a bounded in-process LRU (L1) in
+front of redis (L2) for hot keys, enabled in CACHES with
+
+    "OPTIONS": {
+        "CLIENT_CLASS": "core.cache.TwoTierClient",
+        "L1_KEY_PREFIXES": ["task-view."],
+    }
+
+only keys starting with one of L1_KEY_PREFIXES are kept in L1. a write of
+such a key through any process publishes it on a redis channel and every
+process drops its local copy, so a generation bump by delete_cache reaches
+all gunicorn workers. the writing process drops its copy at once and again
+when its own message comes back, after the write, in case a concurrent
+reader put back the value it replaced. L1_TIMEOUT bounds how long a copy
+can outlive a lost message. values in L1 are shared by the callers of a
+process and must not be mutated.
+
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django_redis.client import DefaultClient
+from django_redis.client.default import _main_exceptions
+from django_redis.exceptions import ConnectionInterrupted
+from django_redis.util import CacheKey
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread safe LRU dict bounded by entry count and by the encoded size of
+    its values, entries expire after `timeout` seconds.
+    """
+
+    def __init__(
+        self, max_entries=1000, max_bytes=64 * 1024 * 1024, timeout=5
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            value, expires, size = entry
+            if expires <= time.monotonic():
+                self._pop(key)
+                return MISSING
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            self._pop(key)
+            self.entries[key] = (value, time.monotonic() + self.timeout, size)
+            self.size += size
+            while (
+                len(self.entries) > self.max_entries
+                or self.size > self.max_bytes
+            ):
+                self._pop(next(iter(self.entries)))
+
+    def delete(self, key):
+        with self.lock:
+            self._pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class LocalTier:
+    """
+    L1 of one cache in this process with its invalidation subscriber and
+    stats counters. Django builds a cache object per thread, and per
+    request under ASGI, they all share this.
+    """
+
+    stats_fields = ("l1_hits", "l2_hits", "misses")
+
+    def __init__(self, options):
+        self.l1 = LRUCache(
+            max_entries=options.get("L1_MAX_ENTRIES", 1000),
+            max_bytes=options.get("L1_MAX_BYTES", 64 * 1024 * 1024),
+            timeout=options.get("L1_TIMEOUT", 5),
+        )
+        self.stats_interval = options.get("L1_STATS_INTERVAL", 10)
+        self.stats = dict.fromkeys(self.stats_fields, 0)
+        self.stats_flushed = time.monotonic()
+        # bumped on every invalidation, a value read from redis while one
+        # arrives may already be outdated and is not kept
+        self.invalidations = 0
+        self.subscribed = threading.Event()
+        self.subscriber_pid = None
+        self.lock = threading.Lock()
+
+
+TIERS = {}
+TIERS_LOCK = threading.Lock()
+
+
+def get_local_tier(name, options):
+    with TIERS_LOCK:
+        tier = TIERS.get(name)
+        if tier is None:
+            tier = TIERS[name] = LocalTier(options)
+        return tier
+
+
+class TwoTierClient(DefaultClient):
+    channel = "cache.l1-invalidation"
+    stats_key = "cache.tier-stats"
+
+    def __init__(self, server, params, backend):
+        super().__init__(server, params, backend)
+        self.l1_prefixes = tuple(self._options.get("L1_KEY_PREFIXES", ()))
+        self.tier = get_local_tier(
+            (tuple(self._server), backend.key_prefix), self._options
+        )
+
+    def is_local(self, key):
+        if isinstance(key, CacheKey):
+            key = key.original_key()
+        return isinstance(key, str) and key.startswith(self.l1_prefixes)
+
+    def get(self, key, default=None, version=None, client=None):
+        if not self.is_local(key) or not self.start_subscriber():
+            return super().get(key, default, version=version, client=client)
+        nkey = str(self.make_key(key, version=version))
+        value = self.tier.l1.get(nkey)
+        if value is not MISSING:
+            self.count("l1_hits")
+            return value
+
+        invalidations = self.tier.invalidations
+        if client is None:
+            client = self.get_client(write=False)
+        try:
+            raw = client.get(nkey)
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+        if raw is None:
+            self.count("misses")
+            return default
+        self.count("l2_hits")
+        value = self.decode(raw)
+        if invalidations == self.tier.invalidations:
+            size = len(raw) if isinstance(raw, bytes) else 8
+            self.tier.l1.set(nkey, value, size)
+        return value
+
+    def set(self, key, value, *args, client=None, **kwargs):
+        result = super().set(key, value, *args, client=client, **kwargs)
+        if result:
+            self.invalidate(key, kwargs.get("version"), client)
+        return result
+
+    def _incr(self, key, *args, version=None, client=None, **kwargs):
+        result = super()._incr(
+            key, *args, version=version, client=client, **kwargs
+        )
+        self.invalidate(key, version, client)
+        return result
+
+    def delete(self, key, version=None, prefix=None, client=None):
+        result = super().delete(
+            key, version=version, prefix=prefix, client=client
+        )
+        self.invalidate(key, version, client)
+        return result
+
+    def delete_many(self, keys, version=None, client=None):
+        keys = list(keys)
+        result = super().delete_many(keys, version=version, client=client)
+        for key in keys:
+            self.invalidate(key, version, client)
+        return result
+
+    def delete_pattern(self, *args, **kwargs):
+        result = super().delete_pattern(*args, **kwargs)
+        self.drop("*")
+        self.publish("*")
+        return result
+
+    def clear(self, client=None):
+        super().clear(client=client)
+        self.drop("*")
+        self.publish("*")
+
+    def invalidate(self, key, version=None, client=None):
+        if self.l1_prefixes and self.is_local(key):
+            nkey = str(self.make_key(key, version=version))
+            self.drop(nkey)
+            self.publish(nkey, client)
+
+    def publish(self, message, client=None):
+        if client is None:
+            client = self.get_client(write=True)
+        # a pipeline sends it with the write
+        client.publish(self.channel, message)
+
+    def drop(self, message):
+        self.tier.invalidations += 1
+        if message == "*":
+            self.tier.l1.clear()
+        else:
+            self.tier.l1.delete(message)
+
+    def start_subscriber(self):
+        """
+        Listen for invalidations once per process, L1 is bypassed until
+        the subscription is active. Returns whether L1 can be used.
+        """
+        tier = self.tier
+        if tier.subscriber_pid != os.getpid():
+            with tier.lock:
+                if tier.subscriber_pid != os.getpid():
+                    # forked from a process that had started one
+                    tier.subscribed.clear()
+                    tier.l1.clear()
+                    threading.Thread(
+                        target=self.listen,
+                        name="cache-l1-invalidation",
+                        daemon=True,
+                    ).start()
+                    tier.subscriber_pid = os.getpid()
+        return tier.subscribed.is_set()
+
+    def listen(self):
+        while True:
+            pubsub = self.get_client(write=False).pubsub(
+                ignore_subscribe_messages=True
+            )
+            try:
+                pubsub.subscribe(self.channel)
+                pubsub.get_message(timeout=1)
+                # messages may have been lost while not subscribed
+                self.drop("*")
+                self.tier.subscribed.set()
+                for message in pubsub.listen():
+                    data = message["data"]
+                    if isinstance(data, bytes):
+                        data = data.decode()
+                    # own writes too, the value may have been read back
+                    # between the local drop and the write
+                    self.drop(data)
+            except Exception:
+                logger.warning("cache invalidation channel lost, retrying")
+                self.tier.subscribed.clear()
+                self.drop("*")
+                time.sleep(1)
+            finally:
+                # give the connection back to the pool before retrying
+                pubsub.close()
+
+    def count(self, field):
+        tier = self.tier
+        with tier.lock:
+            tier.stats[field] += 1
+            flush = (
+                time.monotonic() - tier.stats_flushed >= tier.stats_interval
+            )
+        if flush:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """
+        Add the counters of this process to the totals kept in redis.
+        """
+        tier = self.tier
+        with tier.lock:
+            stats = tier.stats
+            tier.stats = dict.fromkeys(tier.stats_fields, 0)
+            tier.stats_flushed = time.monotonic()
+        pipeline = self.get_client(write=True).pipeline()
+        for field, value in stats.items():
+            if value:
+                pipeline.hincrby(
+                    str(self.make_key(self.stats_key)), field, value
+                )
+        pipeline.execute()
+
+    def get_tier_stats(self):
+        """
+        Return the L1/L2 hits and misses of all processes with the L1 and
+        L2 hit ratio, counters of the last stats interval may be missing.
+        """
+        totals = self.get_client(write=False).hgetall(
+            str(self.make_key(self.stats_key))
+        )
+        stats = {
+            field: int(totals.get(field.encode(), 0))
+            for field in LocalTier.stats_fields
+        }
+        total = sum(stats.values())
+        stats["l1_hit_ratio"] = stats["l1_hits"] / total if total else 0.0
+        stats["l2_hit_ratio"] = stats["l2_hits"] / total if total else 0.0
+        return stats
+
+    def reset_tier_stats(self):
+        with self.tier.lock:
+            self.tier.stats = dict.fromkeys(LocalTier.stats_fields, 0)
+        self.get_client(write=True).delete(str(self.make_key(self.stats_key)))
@@ -0,0 +1,173 @@
+"""
+serializers and a compressor for django_redis, set in the cache OPTIONS:
+
+    "SERIALIZER": "core.cache_codec.OrjsonSerializer",
+    "COMPRESSOR": "core.cache_codec.ThresholdCompressor",
+    "COMPRESS_ALGORITHM": "zstd",
+    "COMPRESS_MIN_LENGTH": 1024,
+
+API payloads (dicts, lists, strings, numbers) are encoded with orjson or
+msgpack. anything else, like model instances, the HttpResponse objects of
+cache_page or datetimes, falls back to pickle so it comes back unchanged.
+tuples come back as lists, UUIDs and enums as their value.
+
+every serialized value starts with a byte naming its format and every
+compressed one with a byte naming the algorithm, so entries written with
+other settings, or by the pickle serializer before, can still be read.
+"""
+
+import pickle
+import zlib
+
+import msgpack
+import orjson
+from django.core.exceptions import ImproperlyConfigured
+from django_redis.compressors.base import BaseCompressor
+from django_redis.exceptions import CompressorError
+from django_redis.serializers.base import BaseSerializer
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+ORJSON_TAG = b"j"
+MSGPACK_TAG = b"m"
+PICKLE_TAG = b"p"
+
+
+class TaggedSerializer(BaseSerializer):
+    """
+    Encode with `encode_value` and fall back to pickle for values it does
+    not support.
+    """
+
+    tag = None
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.pickle_version = int(
+            options.get("PICKLE_VERSION", pickle.DEFAULT_PROTOCOL)
+        )
+
+    def encode_value(self, value):
+        raise NotImplementedError
+
+    def dumps(self, value):
+        try:
+            return self.tag + self.encode_value(value)
+        except (TypeError, ValueError, OverflowError):
+            return PICKLE_TAG + pickle.dumps(value, self.pickle_version)
+
+    def loads(self, value):
+        tag = value[:1]
+        # avoid copying large payloads to strip the tag
+        body = memoryview(value)[1:]
+        if tag == ORJSON_TAG:
+            return orjson.loads(body)
+        if tag == MSGPACK_TAG:
+            return msgpack.unpackb(body, raw=False, strict_map_key=False)
+        if tag == PICKLE_TAG:
+            return pickle.loads(body)
+        # untagged, written by the pickle serializer of django_redis
+        return pickle.loads(value)
+
+
+class OrjsonSerializer(TaggedSerializer):
+    tag = ORJSON_TAG
+    # datetimes would come back as strings, pickle them instead
+    dump_options = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+    def encode_value(self, value):
+        return orjson.dumps(value, option=self.dump_options)
+
+
+class MsgpackSerializer(TaggedSerializer):
+    tag = MSGPACK_TAG
+
+    def encode_value(self, value):
+        return msgpack.packb(value, use_bin_type=True)
+
+
+def zstd_compress(value, level):
+    return zstandard.compress(value, 3 if level is None else level)
+
+
+def lz4_compress(value, level):
+    return lz4.frame.compress(value, compression_level=level or 0)
+
+
+def zlib_compress(value, level):
+    return zlib.compress(value, 6 if level is None else level)
+
+
+def zstd_decompress(value):
+    return zstandard.decompress(value)
+
+
+def lz4_decompress(value):
+    return lz4.frame.decompress(value)
+
+
+# name: (header, module, compress, decompress), headers never start the
+# output of a serializer: tags are letters and pickle starts with 0x80
+ALGORITHMS = {
+    "zlib": (b"\x01", zlib, zlib_compress, zlib.decompress),
+    "zstd": (b"\x02", zstandard, zstd_compress, zstd_decompress),
+    "lz4": (b"\x03", lz4, lz4_compress, lz4_decompress),
+}
+
+
+class ThresholdCompressor(BaseCompressor):
+    """
+    Compress values longer than COMPRESS_MIN_LENGTH bytes with
+    COMPRESS_ALGORITHM (zstd, lz4 or zlib) at COMPRESS_LEVEL, when it
+    makes them smaller. Values are decompressed with the algorithm they
+    were written with.
+    """
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.algorithm = options.get("COMPRESS_ALGORITHM", "zstd")
+        self.min_length = int(options.get("COMPRESS_MIN_LENGTH", 1024))
+        self.level = options.get("COMPRESS_LEVEL")
+        if self.algorithm not in ALGORITHMS:
+            raise ImproperlyConfigured(
+                f"COMPRESS_ALGORITHM must be one of {', '.join(ALGORITHMS)}"
+            )
+        self.header, module, self.compress_value, _ = ALGORITHMS[
+            self.algorithm
+        ]
+        if module is None:
+            raise ImproperlyConfigured(
+                f"COMPRESS_ALGORITHM {self.algorithm} is not installed"
+            )
+        self.decompressors = {
+            header: (name, module, decompress)
+            for name, (header, module, _, decompress) in ALGORITHMS.items()
+        }
+
+    def compress(self, value):
+        if len(value) < self.min_length:
+            return value
+        compressed = self.header + self.compress_value(value, self.level)
+        return compressed if len(compressed) < len(value) else value
+
+    def decompress(self, value):
+        decompressor = self.decompressors.get(value[:1])
+        if decompressor is None:
+            return value
+        name, module, decompress = decompressor
+        if module is None:
+            raise CompressorError(f"{name} is not installed")
+        try:
+            return decompress(memoryview(value)[1:])
+        except Exception as exc:
+            raise CompressorError(exc) from exc
@@ -0,0 +1,48 @@
+class HealthCheckMixin:
+    """
+    Database wrapper mixin backporting CONN_HEALTH_CHECKS of Django 4.1.
+
+    With persistent connections (CONN_MAX_AGE) and CONN_HEALTH_CHECKS set
+    in the database settings, a connection reused by a new request is
+    checked with is_usable() before its first query and reopened if the
+    server dropped it (restart, failover, idle timeout), instead of
+    failing that request.
+    """
+
+    health_check_enabled = False
+    health_check_done = False
+
+    def connect(self):
+        self.health_check_enabled = self.settings_dict.get(
+            "CONN_HEALTH_CHECKS", False
+        )
+        # a new connection works
+        self.health_check_done = True
+        super().connect()
+
+    def close_if_unusable_or_obsolete(self):
+        # called when a request starts and ends
+        if self.connection is not None:
+            self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
+
+    def close_if_health_check_failed(self):
+        if (
+            self.connection is None
+            or not self.health_check_enabled
+            or self.health_check_done
+            or self.in_atomic_block
+        ):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
+
+    def set_autocommit(self, autocommit, *args, **kwargs):
+        # atomic() starts its transaction here, before any cursor
+        self.close_if_health_check_failed()
+        super().set_autocommit(autocommit, *args, **kwargs)
@@ -0,0 +1,166 @@
+"""
+in-process database connection pool for the backends in core.db, enabled
+per database in its OPTIONS:
+
+    "CONN_MAX_AGE": 0,
+    "OPTIONS": {"pool": {"max_size": 10, "timeout": 10}},
+
+a connection closed by django at the end of a request goes back to the
+pool of its process instead of being closed, the next request of any
+thread takes it without a new TCP and auth handshake. psycopg2's pools
+raise as soon as they are exhausted, this one waits for a connection.
+"""
+
+import functools
+import os
+import threading
+from collections import deque
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+def is_usable(connection):
+    try:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        finally:
+            cursor.close()
+        # do not leave a transaction open outside of autocommit
+        connection.rollback()
+    except Exception:
+        return False
+    return True
+
+
+def close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """
+    Thread safe pool of at most `max_size` open DB-API connections.
+    `get` waits up to `timeout` seconds for one when all are in use.
+    """
+
+    def __init__(self, max_size=10, timeout=10.0):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle = deque()
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.lock = threading.Lock()
+
+    def get(self, connect, check=None):
+        """
+        Return an idle connection, the most recently used one, or a new
+        one from `connect`. Idle connections failing `check` are closed.
+        """
+        if not self.slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(
+                f"no database connection free within {self.timeout}s"
+            )
+        try:
+            while True:
+                with self.lock:
+                    connection = self.idle.pop() if self.idle else None
+                if connection is None:
+                    return connect()
+                if check is None or check(connection):
+                    return connection
+                close_quietly(connection)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def put(self, connection, discard=False):
+        """
+        Give back a connection taken with `get`, rolling back what is left
+        of its transaction. Broken or discarded ones are closed.
+        """
+        try:
+            if not discard:
+                try:
+                    connection.rollback()
+                except Exception:
+                    discard = True
+            if discard:
+                close_quietly(connection)
+            else:
+                with self.lock:
+                    self.idle.append(connection)
+        finally:
+            self.slots.release()
+
+    def close(self):
+        with self.lock:
+            while self.idle:
+                close_quietly(self.idle.pop())
+
+
+POOLS = {}
+POOLS_LOCK = threading.Lock()
+
+
+def get_pool(name, options):
+    # forked workers must not share the sockets of the parent pool
+    key = (os.getpid(), name)
+    with POOLS_LOCK:
+        pool = POOLS.get(key)
+        if pool is None:
+            pool = POOLS[key] = ConnectionPool(**options)
+        return pool
+
+
+class PooledConnectionMixin:
+    """
+    Database wrapper mixin taking connections from the pool of the
+    process when OPTIONS has a "pool", see the module docstring.
+    """
+
+    @property
+    def pool(self):
+        options = self.settings_dict["OPTIONS"].get("pool")
+        if not options:
+            return None
+        return get_pool(self.alias, options)
+
+    def check_settings(self):
+        super().check_settings()
+        if self.pool is not None and self.settings_dict["CONN_MAX_AGE"]:
+            raise ImproperlyConfigured(
+                "database pooling needs CONN_MAX_AGE = 0, connections go "
+                "back to the pool at the end of each request"
+            )
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("pool", None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connect = functools.partial(super().get_new_connection, conn_params)
+        check = (
+            is_usable if self.settings_dict.get("CONN_HEALTH_CHECKS") else None
+        )
+        try:
+            return pool.get(connect, check=check)
+        except PoolTimeout as exc:
+            raise self.Database.OperationalError(str(exc)) from exc
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        # django keeps using a connection closed in an atomic block
+        # until the block exits, do not hand it to another thread
+        pool.put(self.connection, discard=self.in_atomic_block)
@@ -0,0 +1,16 @@
+from django.db.backends.postgresql import base
+
+from ..health import HealthCheckMixin
+from ..pool import PooledConnectionMixin
+
+
+class DatabaseWrapper(
+    PooledConnectionMixin, HealthCheckMixin, base.DatabaseWrapper
+):
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        # django sets it when opening a connection, not for pooled ones
+        self.isolation_level = self.settings_dict["OPTIONS"].get(
+            "isolation_level", connection.isolation_level
+        )
+        return connection
@@ -0,0 +1,166 @@
+"""
+read replica routing. views serving safe requests from a replica mix in
+ReplicaReadMixin, everything else reads and writes the default database:
+
+    DATABASE_ROUTERS = ["core.db.router.ReplicaRouter"]
+    MIDDLEWARE = [..., "core.db.router.ReplicaRoutingMiddleware"]
+    REPLICA_DATABASES = ["replica"]
+
+a request that writes pins its client to the primary for
+REPLICA_STICKY_SECONDS, longer than the replication lag, with a cookie
+and, for an authenticated user, a cache marker seen by all its clients.
+a replica that cannot be connected to is skipped for
+REPLICA_RETRY_SECONDS and its reads go to the primary.
+"""
+
+import contextvars
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = "db_primary"
+
+
+class RequestRouting:
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+routing = contextvars.ContextVar("db_routing", default=None)
+
+# alias: monotonic time until which the replica is skipped
+unavailable = {}
+
+
+def get_pin_key(user_id):
+    return f"db-primary.{user_id}"
+
+
+def is_pinned(request):
+    """
+    Whether the client wrote recently and must read from the primary.
+    """
+    try:
+        if float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return cache.get(get_pin_key(user.pk)) is not None
+    return False
+
+
+def pin(request, response):
+    sticky = settings.REPLICA_STICKY_SECONDS
+    response.set_cookie(
+        PIN_COOKIE,
+        str(int(time.time() + sticky)),
+        max_age=sticky,
+        httponly=True,
+        samesite="Lax",
+    )
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        cache.set(get_pin_key(user.pk), 1, sticky)
+
+
+def is_available(alias):
+    if unavailable.get(alias, 0) > time.monotonic():
+        return False
+    connection = connections[alias]
+    try:
+        # reopens a persistent connection the server dropped
+        if hasattr(connection, "close_if_health_check_failed"):
+            connection.close_if_health_check_failed()
+        connection.ensure_connection()
+    except DatabaseError:
+        logger.warning("replica %s is unavailable, using the primary", alias)
+        unavailable[alias] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+        return False
+    return True
+
+
+def choose_replica():
+    """
+    Return a random available replica or None for the primary.
+    """
+    replicas = list(settings.REPLICA_DATABASES)
+    random.shuffle(replicas)
+    for alias in replicas:
+        if is_available(alias):
+            return alias
+    return None
+
+
+def use_replica(request):
+    """
+    Send the reads of the rest of this request to a replica, unless the
+    client is pinned to the primary.
+    """
+    state = routing.get()
+    if state is None or not settings.REPLICA_DATABASES:
+        return
+    if not is_pinned(request):
+        state.replica = choose_replica()
+
+
+class ReplicaRouter:
+    """
+    Outside of requests (shell, commands, migrations) it leaves the choice
+    to django, which honours using() and the database of instances.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = routing.get()
+        if state is None:
+            return None
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = routing.get()
+        if state is None:
+            return None
+        state.wrote = True
+        # also for objects read from a replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    def process_request(self, request):
+        request.db_routing = RequestRouting()
+        routing.set(request.db_routing)
+
+    def process_response(self, request, response):
+        routing.set(None)
+        state = getattr(request, "db_routing", None)
+        if state is not None and state.wrote:
+            pin(request, response)
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    API view mixin reading from a replica for safe methods. Decided after
+    authentication, which reads the primary.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            use_replica(request)
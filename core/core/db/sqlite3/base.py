@@ -0,0 +1,10 @@
+from django.db.backends.sqlite3 import base
+
+from ..health import HealthCheckMixin
+from ..pool import PooledConnectionMixin
+
+
+class DatabaseWrapper(
+    PooledConnectionMixin, HealthCheckMixin, base.DatabaseWrapper
+):
+    pass
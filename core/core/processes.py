@@ -0,0 +1,17 @@
+"""
+process pools of the management commands. workers are spawned or forked
+without django set up, each one sets it up once when it starts.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+
+def setup_worker():
+    # spawned workers start with an empty interpreter
+    django.setup()
+
+
+def process_pool(workers):
+    return ProcessPoolExecutor(workers, initializer=setup_worker)
@@ -61,6 +61,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # read replica routing and stickiness, see core.db.router
+    "core.db.router.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -71,7 +73,7 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [
-            BASE_DIR / "templates",
+            BASE_DIR.parent / "templates",
         ],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -110,6 +112,21 @@ WSGI_APPLICATION = "core.wsgi.application"
 #     }
 # }
 
+# safe requests of views with core.db.router.ReplicaReadMixin read from
+# one of these database aliases, the settings modules define them
+DATABASE_ROUTERS = ["core.db.router.ReplicaRouter"]
+REPLICA_DATABASES = []
+# a client that wrote reads from the primary for this long, keep it above
+# the replication lag
+REPLICA_STICKY_SECONDS = config("REPLICA_STICKY_SECONDS", cast=int, default=5)
+# a replica that cannot be connected to is skipped for this long
+REPLICA_RETRY_SECONDS = config("REPLICA_RETRY_SECONDS", cast=int, default=30)
+
+
+# email of the user given the tasks without an owner by the migration
+# adding owners, left without one when empty
+TASK_ORPHAN_OWNER = config("TASK_ORPHAN_OWNER", default="")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -165,14 +182,44 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "accounts.User"
 
 REST_FRAMEWORK = {
+    # picks basic, session, token or jwt authentication from the
+    # Authorization header
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.BasicAuthentication",
-        "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.TokenAuthentication",
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ]
+        "accounts.authentication.HeaderDispatchAuthentication",
+    ],
+    # limits the views with a throttle_scope, see core.throttling
+    "DEFAULT_THROTTLE_CLASSES": ["core.throttling.SlidingWindowThrottle"],
+    "DEFAULT_THROTTLE_RATES": {
+        # per user, per account tried (register, login, email), or per ip
+        "task-write": config("THROTTLE_TASK_WRITE", default="120/min"),
+        # tasks, bulk requests are charged one per task
+        "task-bulk": config("THROTTLE_TASK_BULK", default="20000/hour"),
+        "register": config("THROTTLE_REGISTER", default="5/hour"),
+        "login": config("THROTTLE_LOGIN", default="10/min"),
+        "email": config("THROTTLE_EMAIL", default="5/hour"),
+        # per ip whoever the user, against clients cycling accounts
+        "register.ip": config("THROTTLE_REGISTER_IP", default="20/hour"),
+        "login.ip": config("THROTTLE_LOGIN_IP", default="60/min"),
+        "email.ip": config("THROTTLE_EMAIL_IP", default="20/hour"),
+    },
+    # proxies in front of the app, the client ip is the address the
+    # first one saw, X-Forwarded-For is not trusted without one
+    "NUM_PROXIES": config("NUM_PROXIES", cast=int, default=0),
 }
 
+# seconds a successful basic auth password check is remembered
+
+BASIC_AUTH_CACHE_TIMEOUT = config(
+    "BASIC_AUTH_CACHE_TIMEOUT", cast=int, default=60
+)
+
+# trust the is_verified claim of current jwt tokens instead of reading
+# the user row, see accounts.authentication.ClaimsJWTAuthentication
+
+JWT_CLAIMS_AUTHENTICATION = config(
+    "JWT_CLAIMS_AUTHENTICATION", cast=bool, default=False
+)
+
 # email configuration
 
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
@@ -182,9 +229,37 @@ EMAIL_HOST_USER = ""
 EMAIL_HOST_PASSWORD = ""
 EMAIL_PORT = 25
 
+# outbound mail queue, see accounts.tasks.queue_email
+
+EMAIL_QUEUE_BATCH_SIZE = config("EMAIL_QUEUE_BATCH_SIZE", cast=int, default=50)
+# seconds celery waits before sending, so emails queued meanwhile are grouped
+EMAIL_QUEUE_BATCH_DELAY = config(
+    "EMAIL_QUEUE_BATCH_DELAY", cast=float, default=2.0
+)
+
+# upstream weather api proxied by accounts.views.WeatherTestView
+
+WEATHER_API_URL = config(
+    "WEATHER_API_URL",
+    default="https://api.openweathermap.org/data/2.5/weather?lat=37.268219&lon=49.589123&appid=9be11538ceebf4c5d0ee0c5d97579881",
+)
+WEATHER_CACHE_TTL = config("WEATHER_CACHE_TTL", cast=int, default=60 * 20)
+WEATHER_CACHE_STALE_TTL = config(
+    "WEATHER_CACHE_STALE_TTL", cast=int, default=60 * 60
+)
+
 # celery configuration
 
 CELERY_BROKER_URL = "redis://redis:6379/1"
+CELERY_BEAT_SCHEDULE = {
+    # emails queue_email did not schedule, or whose send was lost
+    "send pending emails": {
+        "task": "accounts.tasks.send_pending_emails",
+        "schedule": config(
+            "EMAIL_QUEUE_SWEEP_INTERVAL", cast=float, default=60.0
+        ),
+    },
+}
 
 # caching configuration
 
@@ -193,7 +268,30 @@ CACHES = {
         "BACKEND": "django_redis.cache.RedisCache",
         "LOCATION": "redis://redis:6379/2",
         "OPTIONS": {
-            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # in-process LRU in front of redis for the keys below
+            "CLIENT_CLASS": "core.cache.TwoTierClient",
+            "L1_KEY_PREFIXES": ["task-view."],
+            "L1_MAX_ENTRIES": config(
+                "CACHE_L1_MAX_ENTRIES", cast=int, default=1000
+            ),
+            "L1_MAX_BYTES": config(
+                "CACHE_L1_MAX_BYTES", cast=int, default=64 * 1024 * 1024
+            ),
+            "L1_TIMEOUT": config(
+                "CACHE_L1_TIMEOUT", cast=float, default=5
+            ),
+            # API payloads as orjson, other values fall back to pickle
+            "SERIALIZER": config(
+                "CACHE_SERIALIZER",
+                default="core.cache_codec.OrjsonSerializer",
+            ),
+            "COMPRESSOR": "core.cache_codec.ThresholdCompressor",
+            "COMPRESS_ALGORITHM": config(
+                "CACHE_COMPRESS_ALGORITHM", default="zstd"
+            ),
+            "COMPRESS_MIN_LENGTH": config(
+                "CACHE_COMPRESS_MIN_LENGTH", cast=int, default=1024
+            ),
         },
     }
 }
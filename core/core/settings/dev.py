@@ -1,4 +1,5 @@
 from core.settings.base import *
+from decouple import Csv
 
 DEBUG = True
 
@@ -6,5 +7,13 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-    }
+    },
+    # a second local database standing in for a read replica, migrate it
+    # and list it in REPLICA_DATABASES to route reads to it
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.replica.sqlite3",
+    },
 }
+
+REPLICA_DATABASES = config("REPLICA_DATABASES", cast=Csv(), default="")
@@ -1,15 +1,48 @@
 from core.settings.base import *
+from decouple import Csv
 
 DEBUG = False
 
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        # postgres with connection health checks and optional pooling
+        "ENGINE": "core.db.postgresql",
         "NAME": "postgres",
         "USER": "postgres",
         "PASSWORD": "postgres",
         "HOST": "db",  # set in docker-compose.yml
         "PORT": 5432,  # default postgres port
+        # keep connections open across requests instead of a TCP and auth
+        # handshake per request, checked before a new request reuses them
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", cast=int, default=60),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
+
+# share DB_POOL_SIZE connections between the threads of a worker instead
+# of keeping one per thread, connections go back to the pool after each
+# request so CONN_MAX_AGE must be 0
+DB_POOL_SIZE = config("DB_POOL_SIZE", cast=int, default=0)
+if DB_POOL_SIZE:
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "max_size": DB_POOL_SIZE,
+            "timeout": config("DB_POOL_TIMEOUT", cast=float, default=10),
+        }
+    }
+
+# streaming replicas of the primary, one per host in DB_REPLICA_HOSTS,
+# with the connection settings of the primary
+for i, host in enumerate(config("DB_REPLICA_HOSTS", cast=Csv(), default="")):
+    DATABASES[f"replica{i}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        # tests run against the primary only
+        "TEST": {"MIRROR": "default"},
+    }
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != "default"]
+
+# nginx adds the client address to X-Forwarded-For
+REST_FRAMEWORK["NUM_PROXIES"] = config("NUM_PROXIES", cast=int, default=1)
@@ -0,0 +1,177 @@
+"""
+rate limiting with sliding window counters in redis, for views with a
+`throttle_scope`:
+
+    "DEFAULT_THROTTLE_CLASSES": ["core.throttling.SlidingWindowThrottle"],
+    "DEFAULT_THROTTLE_RATES": {
+        "login": "10/min",  # per user, per account tried, or per ip
+        "login.ip": "60/min",  # per ip, whatever the user or account
+    },
+
+anonymous requests to a view with a `throttle_account_field` (login,
+register, password reset) are counted against the account named by that
+field of the request data, the ".ip" rate caps a client cycling accounts.
+
+a window keeps one counter, the count of a client is the counter of the
+current window plus the counter of the previous one weighted by the part
+of it still inside the sliding window. unlike the request history drf
+throttles keep in the cache with a get then a set, all the rules of a
+request are checked and counted by one lua script, atomically and in one
+round trip.
+"""
+
+import hashlib
+import logging
+import time
+from collections.abc import Mapping
+
+from django.core.cache import caches
+from django_redis import get_redis_connection
+from redis.exceptions import RedisError
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+# KEYS: counters of the current and previous window of each rule
+# ARGV: the time in ms and the cost of the request, then the limit and
+# window in ms of each rule
+# returns 0 when the request is allowed and counted, else the ms to wait
+SLIDING_WINDOW = """
+local now = tonumber(ARGV[1])
+local costs = {}
+local wait = 0
+for i = 1, #KEYS / 2 do
+    local limit = tonumber(ARGV[i * 2 + 1])
+    local window = tonumber(ARGV[i * 2 + 2])
+    -- a request costing more than the limit takes all of it
+    local cost = math.min(tonumber(ARGV[2]), limit)
+    local elapsed = now % window
+    local current = tonumber(redis.call("GET", KEYS[i * 2 - 1]) or 0)
+    local previous = tonumber(redis.call("GET", KEYS[i * 2]) or 0)
+    local left = limit - cost - current
+    if previous * (window - elapsed) / window > left then
+        local rule_wait = window - elapsed
+        if left >= 0 then
+            -- until enough of the previous window has slid out
+            rule_wait = rule_wait - left * window / previous
+        end
+        wait = math.max(wait, math.ceil(rule_wait))
+    end
+    costs[i] = cost
+end
+if wait > 0 then
+    return wait
+end
+for i = 1, #KEYS / 2 do
+    redis.call("INCRBY", KEYS[i * 2 - 1], costs[i])
+    redis.call("PEXPIRE", KEYS[i * 2 - 1], tonumber(ARGV[i * 2 + 2]) * 2)
+end
+return 0
+"""
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+script = None
+
+
+def parse_rate(rate):
+    """
+    Return (requests, seconds) of a drf rate like "10/min", or None.
+    """
+    if not rate:
+        return None
+    num, period = rate.split("/")
+    return int(num), DURATIONS[period[0]]
+
+
+def get_script(client):
+    # sent as EVALSHA, redis-py loads the script when redis lacks it
+    global script
+    if script is None:
+        script = client.register_script(SLIDING_WINDOW)
+    return script
+
+
+def hit(rules, cache_alias="default", now=None, cost=1):
+    """
+    Count a request of `cost` requests against `rules`, (key, limit,
+    seconds) tuples, if it is allowed by all of them. Return 0 or the
+    seconds to wait otherwise.
+    """
+    cache = caches[cache_alias]
+    now = int((time.time() if now is None else now) * 1000)
+    keys = []
+    args = [now, cost]
+    for key, limit, seconds in rules:
+        window = seconds * 1000
+        base = cache.make_key(f"throttle.{key}")
+        keys += [f"{base}.{now // window}", f"{base}.{now // window - 1}"]
+        args += [limit, window]
+    client = get_redis_connection(cache_alias)
+    return get_script(client)(keys=keys, args=args, client=client) / 1000
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Throttle the views with a `throttle_scope` at the rates of
+    DEFAULT_THROTTLE_RATES, see the module docstring. A request counts as
+    many requests as the `get_throttle_cost(request)` of its view returns,
+    one without it. Requests are let through when redis cannot be reached.
+    """
+
+    scope_attr = "throttle_scope"
+    cache_alias = "default"
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_rules(self, request, view, scope):
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        ident = self.get_ident(request)
+        account = self.get_account(request, view)
+        if request.user and request.user.is_authenticated:
+            client = f"user.{request.user.pk}"
+        elif account:
+            client = f"account.{account}"
+        else:
+            client = f"anon.{ident}"
+        rules = []
+        for name, key in (
+            (scope, f"{scope}.{client}"),
+            (f"{scope}.ip", f"{scope}.ip.{ident}"),
+        ):
+            rate = parse_rate(rates.get(name))
+            if rate is not None:
+                rules.append((key, *rate))
+        return rules
+
+    def get_account(self, request, view):
+        # a digest, the key holds no address and has a bounded length
+        field = getattr(view, "throttle_account_field", None)
+        if not field or not isinstance(request.data, Mapping):
+            return None
+        value = request.data.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return None
+        value = value.strip().lower().encode()
+        return hashlib.sha256(value).hexdigest()[:32]
+
+    def allow_request(self, request, view):
+        scope = getattr(view, self.scope_attr, None)
+        if not scope:
+            return True
+        rules = self.get_rules(request, view, scope)
+        if not rules:
+            return True
+        get_cost = getattr(view, "get_throttle_cost", None)
+        cost = get_cost(request) if get_cost is not None else 1
+        try:
+            self.wait_seconds = hit(rules, self.cache_alias, cost=cost)
+        except RedisError:
+            logger.warning("throttling of %s skipped", scope, exc_info=True)
+            return True
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
@@ -0,0 +1,71 @@
+"""
+gunicorn settings of the stage and prod containers, read from the working
+directory when gunicorn starts without arguments:
+
+    gunicorn                                    # wsgi app, gthread workers
+    GUNICORN_WORKER_CLASS=uvicorn gunicorn      # asgi app, uvicorn workers
+
+the app is loaded once in the master before forking, so the workers share
+its imported code and start quickly. connections are opened lazily after
+the fork and are never shared.
+"""
+
+import os
+
+# "config" is a gunicorn setting, it must not be a name of this module
+from decouple import config as env
+
+
+def cpu_count():
+    # cpus this container may run on, not the cpus of the host
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+WORKER_CLASSES = {
+    "sync": "sync",
+    "gthread": "gthread",
+    "uvicorn": "uvicorn.workers.UvicornWorker",
+}
+
+worker_type = env("GUNICORN_WORKER_CLASS", default="gthread")
+worker_class = WORKER_CLASSES.get(worker_type, worker_type)
+wsgi_app = "core.asgi" if worker_type == "uvicorn" else "core.wsgi"
+
+bind = env("GUNICORN_BIND", default="0.0.0.0:8000")
+preload_app = env("GUNICORN_PRELOAD", cast=bool, default=True)
+
+# a sync worker serves one request at a time and waits on the database
+# most of it, gthread and uvicorn workers overlap requests by themselves
+workers = env(
+    "GUNICORN_WORKERS",
+    cast=int,
+    default=cpu_count() * 2 + 1 if worker_type == "sync" else cpu_count() + 1,
+)
+# more than one thread turns sync workers into gthread ones
+threads = env(
+    "GUNICORN_THREADS", cast=int, default=8 if worker_type == "gthread" else 1
+)
+
+# recycle workers to bound the growth of long lived processes
+max_requests = env("GUNICORN_MAX_REQUESTS", cast=int, default=2000)
+max_requests_jitter = max_requests // 10
+
+# longer than keepalive_timeout of the nginx upstream, so nginx closes
+# idle connections first and never reuses one gunicorn just closed
+keepalive = env("GUNICORN_KEEPALIVE", cast=int, default=75)
+timeout = env("GUNICORN_TIMEOUT", cast=int, default=30)
+graceful_timeout = 30
+
+# worker heartbeats on tmpfs, a disk backed /tmp can block them
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+
+def post_fork(server, worker):
+    # in case loading the app opened a connection in the master
+    from django.db import connections
+
+    connections.close_all()
@@ -23,3 +23,10 @@ class QuickstartUser(HttpUser):
         self.client.post(
             "/TodoApp/api/v1/task/", data={"name": "task", "status": 1}
         )
+
+    @task
+    def task_bulk_post(self):
+        self.client.post(
+            "/TodoApp/api/v1/task/bulk/",
+            json=[{"name": "task", "status": 1} for _ in range(100)],
+        )
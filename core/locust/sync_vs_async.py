@@ -0,0 +1,61 @@
+"""
+compare the task read endpoints under the wsgi and the asgi server.
+
+run the same user count against each server, one at a time, and compare
+the requests/s and latency percentiles reported by locust:
+
+    gunicorn core.wsgi -w 4 --threads 8 --bind 0.0.0.0:8000
+    locust -f locust/sync_vs_async.py SyncTaskReader --headless \\
+        -u 1000 -r 100 -t 2m --host http://127.0.0.1:8000
+
+    gunicorn core.asgi -w 4 -k uvicorn.workers.UvicornWorker \\
+        --bind 0.0.0.0:8000
+    locust -f locust/sync_vs_async.py AsyncTaskReader --headless \\
+        -u 1000 -r 100 -t 2m --host http://127.0.0.1:8000
+"""
+
+import random
+
+from locust import HttpUser, between, task
+
+
+class TaskReader(HttpUser):
+    abstract = True
+    wait_time = between(0.5, 1.5)
+    prefix = ""
+
+    def on_start(self):
+        self.task_ids = []
+
+    @task(3)
+    def task_list(self):
+        response = self.client.get(
+            f"/TodoApp/api/v1/{self.prefix}task/",
+            name=f"{self.prefix}task list",
+        )
+        if response.ok:
+            self.task_ids = [item["id"] for item in response.json()["results"]]
+
+    @task(3)
+    def task_list_filtered(self):
+        self.client.get(
+            f"/TodoApp/api/v1/{self.prefix}task/?status=1&page_size=50",
+            name=f"{self.prefix}task list filtered",
+        )
+
+    @task(1)
+    def task_detail(self):
+        if self.task_ids:
+            self.client.get(
+                f"/TodoApp/api/v1/{self.prefix}task/"
+                f"{random.choice(self.task_ids)}/",
+                name=f"{self.prefix}task detail",
+            )
+
+
+class SyncTaskReader(TaskReader):
+    prefix = ""
+
+
+class AsyncTaskReader(TaskReader):
+    prefix = "async/"